@@ -35,6 +35,11 @@ class Settings(BaseSettings):
     rtyhiim_tick_rate_hz: float = Field(default=1.0, env="RTYHIIM_TICK_RATE_HZ")
     rtyhiim_min_period_s: float = Field(default=8.0, env="RTYHIIM_MIN_PERIOD_S")
     rtyhiim_max_period_s: float = Field(default=240.0, env="RTYHIIM_MAX_PERIOD_S")
+    rtyhiim_workers: int = Field(default=0, env="RTYHIIM_WORKERS")
+    rtyhiim_checkpoint_dir: str | None = Field(default=None, env="RTYHIIM_CHECKPOINT_DIR")
+    rtyhiim_checkpoint_interval_s: float = Field(default=30.0, env="RTYHIIM_CHECKPOINT_INTERVAL_S")
+    rtyhiim_ingest_interval_s: float = Field(default=1.0, env="RTYHIIM_INGEST_INTERVAL_S")
+    rtyhiim_max_detectors: int = Field(default=16, env="RTYHIIM_MAX_DETECTORS")
 
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=False)
 
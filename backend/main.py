@@ -1,4 +1,6 @@
+from contextlib import asynccontextmanager, suppress
 from datetime import datetime
+import asyncio
 import time
 
 from fastapi import FastAPI
@@ -21,11 +23,30 @@ from backend.services.ml_service import run_nasdaq_signal, run_xauusd_signal
 from backend.services.order_block_service import service as order_block_service
 from backend.services.pattern_analyzer import run_claude_pattern_analysis
 from backend.services.pattern_engine_runner import run_pattern_engine
-from backend.services.rtyhiim_service import run_rtyhiim_detector
+from backend.services.rtyhiim_service import (
+    registry as rtyhiim_registry,
+    run_ingestion,
+    run_rtyhiim_detector_async,
+    shutdown_executor,
+)
 from backend.services.sentiment_analyzer import run_claude_sentiment
 from backend.order_block_detector import OrderBlockConfig
 
-app = FastAPI(title="AI Trading Dashboard API", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    ingestion = asyncio.create_task(run_ingestion())
+    yield
+    ingestion.cancel()
+    with suppress(asyncio.CancelledError):
+        await ingestion
+    try:
+        rtyhiim_registry.close()
+    finally:
+        shutdown_executor()
+
+
+app = FastAPI(title="AI Trading Dashboard API", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -70,7 +91,7 @@ async def run_all() -> RunAllResponse:
         limit=500,
         config=OrderBlockConfig(),
     )
-    rtyhiim_result = run_rtyhiim_detector(symbol="NDX.INDX", timeframe="1m")
+    rtyhiim_result = await run_rtyhiim_detector_async(symbol="NDX.INDX", timeframe="1m")
     total_time_ms = int((time.perf_counter() - start) * 1000)
     return RunAllResponse(
         nasdaq=nasdaq_result,
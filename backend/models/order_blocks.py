@@ -11,6 +11,8 @@ class OrderBlockConfigRequest(BaseModel):
     min_score: float = Field(default=50.0, ge=0.0, le=100.0)
     zone_type: Literal["wick", "body"] = "wick"
     max_tests: int = Field(default=2, ge=0, le=5)
+    atr_period: int = Field(default=14, ge=1, le=100)
+    atr_mode: Literal["global", "wilder"] = "global"
 
 
 class OrderBlockDetectRequest(BaseModel):
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel
 
@@ -28,3 +28,4 @@ class RtyhiimResponse(BaseModel):
     timeframe: str
     state: RtyhiimState
     timestamp: str
+    age_s: Optional[float] = None
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import List, Optional
+from collections import deque
+from dataclasses import dataclass, fields, replace
+from typing import Iterable, List, Mapping, Optional, Sequence
+import math
 
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
 
 @dataclass
@@ -16,6 +19,55 @@ class Candle:
     volume: float
 
 
+@dataclass
+class CandleFrame:
+    """Struct-of-arrays candle history with contiguous float64 columns.
+
+    Build it once per history and pass it to ``OrderBlockDetector``; every
+    detector helper reads these columns directly instead of rebuilding
+    arrays from a list of ``Candle`` objects.
+    """
+
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __post_init__(self) -> None:
+        for column in fields(self):
+            setattr(self, column.name, np.ascontiguousarray(getattr(self, column.name), dtype=np.float64))
+        if len({getattr(self, column.name).shape for column in fields(self)}) != 1 or self.close.ndim != 1:
+            raise ValueError("CandleFrame columns must be one-dimensional and of equal length")
+
+    @classmethod
+    def from_candles(cls, candles: Sequence[Candle]) -> "CandleFrame":
+        count = len(candles)
+        return cls(*(np.fromiter((getattr(c, f.name) for c in candles), np.float64, count) for f in fields(cls)))
+
+    @classmethod
+    def from_records(cls, records: Iterable[Mapping[str, object]]) -> "CandleFrame":
+        """Build a frame from mappings with one key per column; missing values become 0."""
+
+        records = list(records)
+        return cls(
+            *(
+                np.fromiter((float(record.get(column.name) or 0.0) for record in records), np.float64, len(records))
+                for column in fields(cls)
+            )
+        )
+
+    def __len__(self) -> int:
+        return self.close.size
+
+    def __getitem__(self, index: int) -> Candle:
+        return Candle(*(float(getattr(self, column.name)[index]) for column in fields(self)))
+
+    def to_candles(self) -> List[Candle]:
+        return [self[index] for index in range(len(self))]
+
+
 @dataclass
 class OrderBlock:
     index: int
@@ -45,6 +97,22 @@ class OrderBlockSignal:
     confidence: float
 
 
+@dataclass
+class OrderBlockEvent:
+    kind: str  # "created", "changed" or "invalidated"
+    order_block: OrderBlock
+
+
+@dataclass
+class _Features:
+    displacement: np.ndarray
+    has_choch: np.ndarray
+    has_bos: np.ndarray
+    has_fvg: np.ndarray
+    volume_ratio: np.ndarray
+    score: np.ndarray
+
+
 @dataclass
 class OrderBlockConfig:
     fractal_period: int = 2
@@ -52,6 +120,8 @@ class OrderBlockConfig:
     min_score: float = 50.0
     zone_type: str = "wick"
     max_tests: int = 2
+    atr_period: int = 14
+    atr_mode: str = "global"
 
 
 class OrderBlockDetector:
@@ -60,48 +130,25 @@ class OrderBlockDetector:
     def __init__(self, config: OrderBlockConfig | None = None) -> None:
         self.config = config or OrderBlockConfig()
 
-    def detect(self, candles: List[Candle]) -> List[OrderBlock]:
-        if len(candles) < 50:
+    def detect(self, candles: CandleFrame | Sequence[Candle]) -> List[OrderBlock]:
+        frame = _as_frame(candles)
+        if len(frame) < 50:
             return []
-        swings_high, swings_low = self._swings(candles)
-        atr = self._atr(candles, period=14)
-        order_blocks: List[OrderBlock] = []
-        for idx in sorted(swings_high + swings_low):
-            candle = candles[idx]
-            is_bullish = idx in swings_low
-            zone_low, zone_high = self._zone_from_candle(candle, is_bullish)
-            displacement = self._displacement(candles, idx, atr)
-            has_choch = displacement >= self.config.min_displacement_atr
-            has_bos = has_choch and self._bos(candles, idx, is_bullish)
-            has_fvg = self._fvg(candles, idx)
-            fib_level = 0.618 if idx % 2 == 0 else 0.786
-            volume_ratio = self._volume_ratio(candles, idx)
-            test_count = self._test_count(candles, zone_low, zone_high, idx)
-            score = self._score(displacement, has_choch, has_bos, has_fvg, volume_ratio)
-            is_valid = score >= self.config.min_score and test_count <= self.config.max_tests
-            order_blocks.append(
-                OrderBlock(
-                    index=idx,
-                    type="bullish" if is_bullish else "bearish",
-                    zone_low=zone_low,
-                    zone_high=zone_high,
-                    score=score,
-                    displacement=displacement,
-                    has_choch=has_choch,
-                    has_bos=has_bos,
-                    has_fvg=has_fvg,
-                    fib_level=fib_level,
-                    volume_ratio=volume_ratio,
-                    test_count=test_count,
-                    is_valid=is_valid,
-                )
-            )
-        return order_blocks
+        swings_high, swings_low = self._swings(frame)
+        # A candle that is both a swing high and a swing low yields two blocks.
+        indices = np.repeat(np.arange(len(frame)), swings_high.astype(np.intp) + swings_low)
+        bullish = swings_low[indices]
+        zone_low, zone_high = self._zones(frame, indices)
+        test_counts = self._test_counts(frame, zone_low, zone_high, indices)
+        features = self._features(frame, indices, bullish)
+        return _order_blocks(self.config, indices, bullish, zone_low, zone_high, features, test_counts)
 
-    def detect_entry(self, candles: List[Candle], order_block: OrderBlock) -> Optional[OrderBlockSignal]:
-        if not candles:
+    def detect_entry(
+        self, candles: CandleFrame | Sequence[Candle], order_block: OrderBlock
+    ) -> Optional[OrderBlockSignal]:
+        if not len(candles):
             return None
-        current = candles[-1].close
+        current = float(candles.close[-1]) if isinstance(candles, CandleFrame) else candles[-1].close
         inside = order_block.zone_low <= current <= order_block.zone_high
         if not inside:
             return None
@@ -125,80 +172,401 @@ class OrderBlockDetector:
             confidence=confidence,
         )
 
-    def _swings(self, candles: List[Candle]) -> tuple[List[int], List[int]]:
-        highs = np.array([c.high for c in candles])
-        lows = np.array([c.low for c in candles])
+    def _swings(self, frame: CandleFrame) -> tuple[np.ndarray, np.ndarray]:
+        """Boolean masks of fractal swing highs and lows.
+
+        A candle is a swing high (low) when its high (low) equals the
+        extreme of the ``2 * fractal_period + 1`` candles centred on it.
+        """
+
         period = self.config.fractal_period
-        swings_high = []
-        swings_low = []
-        for i in range(period, len(candles) - period):
-            if highs[i] == np.max(highs[i - period : i + period + 1]):
-                swings_high.append(i)
-            if lows[i] == np.min(lows[i - period : i + period + 1]):
-                swings_low.append(i)
+        width = 2 * period + 1
+        swings_high = np.zeros(len(frame), dtype=bool)
+        swings_low = np.zeros(len(frame), dtype=bool)
+        if len(frame) >= width:
+            centre = slice(period, len(frame) - period)
+            swings_high[centre] = frame.high[centre] == sliding_window_view(frame.high, width).max(axis=1)
+            swings_low[centre] = frame.low[centre] == sliding_window_view(frame.low, width).min(axis=1)
         return swings_high, swings_low
 
-    def _zone_from_candle(self, candle: Candle, bullish: bool) -> tuple[float, float]:
+    def _zones(self, frame: CandleFrame, indices: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
         if self.config.zone_type == "body":
-            low = min(candle.open, candle.close)
-            high = max(candle.open, candle.close)
-        else:
-            low = candle.low
-            high = candle.high
-        return (low, high) if bullish else (low, high)
-
-    def _atr(self, candles: List[Candle], period: int) -> float:
-        if len(candles) < period + 1:
-            return 0.0
-        ranges = []
-        for i in range(1, len(candles)):
-            high = candles[i].high
-            low = candles[i].low
-            prev_close = candles[i - 1].close
-            ranges.append(max(high - low, abs(high - prev_close), abs(low - prev_close)))
-        return float(np.mean(ranges[-period:]))
-
-    def _displacement(self, candles: List[Candle], index: int, atr: float) -> float:
-        if atr <= 0:
+            return np.minimum(frame.open, frame.close)[indices], np.maximum(frame.open, frame.close)[indices]
+        return frame.low[indices], frame.high[indices]
+
+    def _features(
+        self, frame: CandleFrame, indices: np.ndarray, bullish: np.ndarray, atr: Optional[np.ndarray] = None
+    ) -> _Features:
+        """Score every candidate at once from rolling windows around each index.
+
+        * displacement: high-low range of the 7 candles centred on the index,
+          in ATRs (0 where the ATR is not positive or not yet defined)
+        * has_choch: displacement of at least ``min_displacement_atr``
+        * has_bos: CHoCH and a close beyond the previous 10 candles' extreme
+        * has_fvg: a gap between the candle and the one two bars earlier
+        * volume_ratio: volume over the mean of the trailing 21 candles
+
+        ``atr`` overrides the per-candidate ATR derived from ``frame``.
+        """
+
+        period = self.config.atr_period
+        if atr is None and self.config.atr_mode == "wilder":
+            atr = self._wilder_atr(frame, period)[indices]
+        elif atr is None:
+            atr = np.full(indices.size, self._atr(frame, period))
+
+        high_around = sliding_window_view(np.pad(frame.high, 3, constant_values=-np.inf), 7)[indices]
+        low_around = sliding_window_view(np.pad(frame.low, 3, constant_values=np.inf), 7)[indices]
+        move = high_around.max(axis=1) - low_around.min(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            displacement = np.where(atr > 0, move / atr, 0.0)
+        has_choch = displacement >= self.config.min_displacement_atr
+
+        prior_high = sliding_window_view(np.pad(frame.high, (10, 0), constant_values=-np.inf), 10)[indices]
+        prior_low = sliding_window_view(np.pad(frame.low, (10, 0), constant_values=np.inf), 10)[indices]
+        close = frame.close[indices]
+        breaks = np.where(bullish, close > prior_high.max(axis=1), close < prior_low.min(axis=1))
+        has_bos = has_choch & breaks & (indices > 0)
+
+        earlier = np.maximum(indices - 2, 0)
+        has_fvg = (indices >= 2) & (
+            (frame.high[earlier] < frame.low[indices]) | (frame.low[earlier] > frame.high[indices])
+        )
+
+        average = np.empty(indices.size)
+        full = indices >= 20
+        if len(frame) > 20:
+            average[full] = sliding_window_view(frame.volume, 21)[indices[full] - 20].mean(axis=1)
+        for position in np.flatnonzero(~full):
+            average[position] = np.mean(frame.volume[: indices[position] + 1])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            volume_ratio = np.where(average > 0, frame.volume[indices] / average, 1.0)
+
+        score = self._score(displacement, has_choch, has_bos, has_fvg, volume_ratio)
+        return _Features(displacement, has_choch, has_bos, has_fvg, volume_ratio, score)
+
+    def _atr(self, frame: CandleFrame, period: int) -> float:
+        if len(frame) < period + 1:
             return 0.0
-        start = max(0, index - 3)
-        end = min(len(candles), index + 4)
-        segment = candles[start:end]
-        move = max(c.high for c in segment) - min(c.low for c in segment)
-        return float(move / atr)
-
-    def _bos(self, candles: List[Candle], index: int, bullish: bool) -> bool:
-        lookback = candles[max(0, index - 10) : index]
-        if not lookback:
-            return False
-        highs = [c.high for c in lookback]
-        lows = [c.low for c in lookback]
-        if bullish:
-            return candles[index].close > max(highs)
-        return candles[index].close < min(lows)
-
-    def _fvg(self, candles: List[Candle], index: int) -> bool:
-        if index < 2:
-            return False
-        return candles[index - 2].high < candles[index].low or candles[index - 2].low > candles[index].high
-
-    def _volume_ratio(self, candles: List[Candle], index: int) -> float:
-        volumes = np.array([c.volume for c in candles])
-        avg = np.mean(volumes[max(0, index - 20) : index + 1])
-        return float(volumes[index] / avg) if avg > 0 else 1.0
-
-    def _test_count(self, candles: List[Candle], zone_low: float, zone_high: float, index: int) -> int:
-        count = 0
-        for candle in candles[index + 1 :]:
-            if zone_low <= candle.low <= zone_high or zone_low <= candle.high <= zone_high:
-                count += 1
-        return count
-
-    def _score(self, displacement: float, has_choch: bool, has_bos: bool, has_fvg: bool, volume_ratio: float) -> float:
-        score = 40.0
-        score += min(30.0, displacement * 10.0)
-        score += 10.0 if has_choch else 0.0
-        score += 10.0 if has_bos else 0.0
-        score += 5.0 if has_fvg else 0.0
-        score += min(5.0, (volume_ratio - 1.0) * 5.0)
-        return float(max(0.0, min(100.0, score)))
+        return float(np.mean(_true_range(frame)[-period:]))
+
+    def _wilder_atr(self, frame: CandleFrame, period: int) -> np.ndarray:
+        """Per-bar Wilder ATR; NaN until ``period`` true ranges are available."""
+
+        atr = np.full(len(frame), np.nan)
+        if len(frame) < period + 1:
+            return atr
+        ranges = _true_range(frame)
+        value = float(np.mean(ranges[:period]))
+        smoothed = [value]
+        for true_range in ranges[period:].tolist():
+            value = (value * (period - 1) + true_range) / period
+            smoothed.append(value)
+        atr[period:] = smoothed
+        return atr
+
+    def _test_counts(
+        self, frame: CandleFrame, zone_low: np.ndarray, zone_high: np.ndarray, index: np.ndarray
+    ) -> np.ndarray:
+        """Candles after ``index`` whose low or high lies inside each zone.
+
+        Counted for every zone at once as ``lows inside + highs inside -
+        both inside``. The first two terms come from merge-sort trees over
+        candle time; the last is found by listing only the candles whose
+        low is inside, so its cost is bounded by the counts themselves.
+        Small problems are answered with one dense comparison instead.
+        """
+
+        start = np.asarray(index, dtype=np.intp) + 1
+        if start.size * len(frame) <= _DENSE_TEST_CELLS:
+            later = np.arange(len(frame)) >= start[:, None]
+            low, high = zone_low[:, None], zone_high[:, None]
+            inside = ((low <= frame.low) & (frame.low <= high)) | ((low <= frame.high) & (frame.high <= high))
+            return np.count_nonzero(inside & later, axis=1)
+
+        lows = _SuffixRangeTree(frame.low)
+        highs = _SuffixRangeTree(frame.high)
+        query, later = lows.report(start, zone_low, zone_high)
+        later_high = frame.high[later]
+        both = (zone_low[query] <= later_high) & (later_high <= zone_high[query])
+        counts = (
+            lows.count(start, zone_low, zone_high)
+            + highs.count(start, zone_low, zone_high)
+            - np.bincount(query[both], minlength=start.size)
+        )
+        return counts
+
+    def _score(
+        self,
+        displacement: np.ndarray,
+        has_choch: np.ndarray,
+        has_bos: np.ndarray,
+        has_fvg: np.ndarray,
+        volume_ratio: np.ndarray,
+    ) -> np.ndarray:
+        score = np.full(displacement.shape, 40.0)
+        score += np.minimum(30.0, displacement * 10.0)
+        score += np.where(has_choch, 10.0, 0.0)
+        score += np.where(has_bos, 10.0, 0.0)
+        score += np.where(has_fvg, 5.0, 0.0)
+        score += np.minimum(5.0, (volume_ratio - 1.0) * 5.0)
+        return np.clip(score, 0.0, 100.0)
+
+
+class StreamingOrderBlockDetector:
+    """Incremental order block detection, one candle at a time.
+
+    A candle becomes a block once ``max(fractal_period, 3)`` newer candles
+    have arrived, so both its fractal window and its displacement window
+    are complete. Its features are computed once, from a bounded tail of
+    recent candles, and every later candle only updates the test counts
+    of active zones, i.e. valid blocks. Each change is reported as an
+    ``OrderBlockEvent``.
+
+    With ``atr_mode="wilder"``, blocks match ``OrderBlockDetector.detect``
+    over the same history. With the default global ATR, a block is scored
+    as ``detect`` would have scored it on the bar that confirmed it. A
+    block that is invalid keeps the test count it had when it became
+    invalid. Unlike ``detect``, there is no 50-candle minimum.
+
+    Core API:
+    - append_candle(candle)
+    - order_blocks
+    - active
+    """
+
+    def __init__(self, config: OrderBlockConfig | None = None) -> None:
+        self.config = config or OrderBlockConfig()
+        self._detector = OrderBlockDetector(self.config)
+        self._delay = max(self.config.fractal_period, 3)
+        history = max(20, self.config.fractal_period) + self._delay + 1
+        self._tail: deque[Candle] = deque(maxlen=max(history, self.config.atr_period + 1))
+        self._tail_atr: deque[float] = deque(maxlen=self._tail.maxlen)
+        self._bars = 0
+        self._first_ranges: List[float] = []
+        self._wilder = math.nan
+        self._blocks: List[OrderBlock] = []
+        self._active: List[OrderBlock] = []
+        self._active_low = np.zeros(0)
+        self._active_high = np.zeros(0)
+
+    @property
+    def order_blocks(self) -> List[OrderBlock]:
+        return list(self._blocks)
+
+    @property
+    def active(self) -> List[OrderBlock]:
+        return list(self._active)
+
+    def append_candle(self, candle: Candle) -> List[OrderBlockEvent]:
+        """Ingest the newest closed candle and return the resulting events."""
+
+        self._tail_atr.append(self._update_atr(candle))
+        self._tail.append(candle)
+        self._bars += 1
+        events = self._test_active(candle)
+        events.extend(self._confirm())
+        return events
+
+    def _update_atr(self, candle: Candle) -> float:
+        if self._tail:
+            prev_close = self._tail[-1].close
+            true_range = max(
+                candle.high - candle.low, max(abs(candle.high - prev_close), abs(candle.low - prev_close))
+            )
+            period = self.config.atr_period
+            if len(self._first_ranges) < period:
+                self._first_ranges.append(true_range)
+                if len(self._first_ranges) == period:
+                    self._wilder = float(np.mean(self._first_ranges))
+            else:
+                self._wilder = (self._wilder * (period - 1) + true_range) / period
+        return self._wilder
+
+    def _test_active(self, candle: Candle) -> List[OrderBlockEvent]:
+        if not self._active:
+            return []
+        low, high = self._active_low, self._active_high
+        touched = ((low <= candle.low) & (candle.low <= high)) | ((low <= candle.high) & (candle.high <= high))
+        events = []
+        for position in np.flatnonzero(touched).tolist():
+            block = self._active[position]
+            block.test_count += 1
+            if block.test_count > self.config.max_tests:
+                block.is_valid = False
+                events.append(OrderBlockEvent("invalidated", replace(block)))
+            else:
+                events.append(OrderBlockEvent("changed", replace(block)))
+        if any(event.kind == "invalidated" for event in events):
+            self._set_active([block for block in self._active if block.is_valid])
+        return events
+
+    def _confirm(self) -> List[OrderBlockEvent]:
+        period = self.config.fractal_period
+        index = self._bars - 1 - self._delay
+        if index < period:
+            return []
+        frame = CandleFrame.from_candles(self._tail)
+        offset = self._bars - len(frame)
+        local = index - offset
+        highs = frame.high[local - period : local + period + 1]
+        lows = frame.low[local - period : local + period + 1]
+        is_high = bool(frame.high[local] == highs.max())
+        is_low = bool(frame.low[local] == lows.min())
+        if not (is_high or is_low):
+            return []
+
+        # A candle that is both a swing high and a swing low yields two blocks.
+        indices = np.full(int(is_high) + int(is_low), local)
+        bullish = np.full(indices.size, is_low)
+        atr = np.full(indices.size, self._tail_atr[local]) if self.config.atr_mode == "wilder" else None
+        zone_low, zone_high = self._detector._zones(frame, indices)
+        test_counts = self._detector._test_counts(frame, zone_low, zone_high, indices)
+        features = self._detector._features(frame, indices, bullish, atr)
+
+        blocks = _order_blocks(self.config, indices + offset, bullish, zone_low, zone_high, features, test_counts)
+        self._blocks.extend(blocks)
+        valid = [block for block in blocks if block.is_valid]
+        if valid:
+            self._set_active(self._active + valid)
+        return [OrderBlockEvent("created", replace(block)) for block in blocks]
+
+    def _set_active(self, blocks: List[OrderBlock]) -> None:
+        self._active = blocks
+        self._active_low = np.array([block.zone_low for block in blocks], dtype=np.float64)
+        self._active_high = np.array([block.zone_high for block in blocks], dtype=np.float64)
+
+
+_DENSE_TEST_CELLS = 1 << 18
+
+
+def _order_blocks(
+    config: OrderBlockConfig,
+    indices: np.ndarray,
+    bullish: np.ndarray,
+    zone_low: np.ndarray,
+    zone_high: np.ndarray,
+    features: _Features,
+    test_counts: np.ndarray,
+) -> List[OrderBlock]:
+    is_valid = (features.score >= config.min_score) & (test_counts <= config.max_tests)
+    columns = zip(
+        indices.tolist(),
+        bullish.tolist(),
+        zone_low.tolist(),
+        zone_high.tolist(),
+        features.score.tolist(),
+        features.displacement.tolist(),
+        features.has_choch.tolist(),
+        features.has_bos.tolist(),
+        features.has_fvg.tolist(),
+        features.volume_ratio.tolist(),
+        test_counts.tolist(),
+        is_valid.tolist(),
+    )
+    return [
+        OrderBlock(
+            index=idx,
+            type="bullish" if is_bullish else "bearish",
+            zone_low=low,
+            zone_high=high,
+            score=score,
+            displacement=displacement,
+            has_choch=has_choch,
+            has_bos=has_bos,
+            has_fvg=has_fvg,
+            fib_level=0.618 if idx % 2 == 0 else 0.786,
+            volume_ratio=volume_ratio,
+            test_count=test_count,
+            is_valid=valid,
+        )
+        for (
+            idx,
+            is_bullish,
+            low,
+            high,
+            score,
+            displacement,
+            has_choch,
+            has_bos,
+            has_fvg,
+            volume_ratio,
+            test_count,
+            valid,
+        ) in columns
+    ]
+
+
+def _true_range(frame: CandleFrame) -> np.ndarray:
+    """True range of every candle after the first."""
+
+    high = frame.high[1:]
+    low = frame.low[1:]
+    prev_close = frame.close[:-1]
+    return np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+class _SuffixRangeTree:
+    """Static merge-sort tree answering "items after ``start`` valued in ``[low, high]``".
+
+    Level ``l`` sorts the values inside each aligned block of ``2**l``
+    positions. Values are replaced by exact integer ranks, and every
+    level is one array of ``block * stride + rank`` keys, so a batch of
+    queries is answered with one ``np.searchsorted`` per level. A suffix
+    ``[start, n)`` is covered by at most one block per level.
+    """
+
+    def __init__(self, values: np.ndarray) -> None:
+        self.size = values.size
+        self.uniques = np.unique(values)
+        ranks = np.searchsorted(self.uniques, values)
+        self.stride = self.uniques.size + 1
+        positions = np.arange(self.size)
+        self.levels: List[tuple[np.ndarray, np.ndarray]] = []
+        for level in range(max(1, int(self.size - 1).bit_length() + 1)):
+            keys = (positions >> level) * self.stride + ranks
+            order = np.argsort(keys, kind="stable")
+            self.levels.append((keys[order], order))
+
+    def _ranges(self, start: np.ndarray, low: np.ndarray, high: np.ndarray):
+        lo = np.searchsorted(self.uniques, low, side="left")
+        hi = np.searchsorted(self.uniques, high, side="right")
+        empty = ~(low <= high)
+        start = start.copy()
+        for level, (keys, order) in enumerate(self.levels):
+            take = ((start >> level) & 1).astype(bool) & (start < self.size) & ~empty
+            if level == len(self.levels) - 1:
+                take = (start < self.size) & ~empty
+            base = (start >> level) * self.stride
+            first = np.searchsorted(keys, base + lo, side="left")
+            last = np.searchsorted(keys, base + hi, side="left")
+            yield take, first, last, order
+            start = start + (take << level)
+
+    def count(self, start: np.ndarray, low: np.ndarray, high: np.ndarray) -> np.ndarray:
+        counts = np.zeros(start.size, dtype=np.intp)
+        for take, first, last, _ in self._ranges(start, low, high):
+            counts += np.where(take, last - first, 0)
+        return counts
+
+    def report(self, start: np.ndarray, low: np.ndarray, high: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Matching ``(query, position)`` pairs."""
+
+        queries: List[np.ndarray] = []
+        found: List[np.ndarray] = []
+        for take, first, last, order in self._ranges(start, low, high):
+            lengths = np.where(take, last - first, 0)
+            total = int(lengths.sum())
+            if not total:
+                continue
+            query = np.repeat(np.arange(start.size), lengths)
+            offsets = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+            queries.append(query)
+            found.append(order[first[query] + offsets])
+        if not queries:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+        return np.concatenate(queries), np.concatenate(found)
+
+
+def _as_frame(candles: CandleFrame | Sequence[Candle]) -> CandleFrame:
+    return candles if isinstance(candles, CandleFrame) else CandleFrame.from_candles(candles)
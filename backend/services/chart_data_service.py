@@ -3,13 +3,14 @@ from __future__ import annotations
 from datetime import datetime, timedelta
 import math
 import random
-from typing import List
+from typing import List, Optional
 
 import httpx
 import numpy as np
 
 from backend.config import settings
 from backend.models.chart import ChartCandle, SupportResistanceLevel
+from backend.order_block_detector import CandleFrame
 
 _TIMEFRAME_MINUTES = {
     "5m": 5,
@@ -21,25 +22,8 @@ _TIMEFRAME_MINUTES = {
 
 
 async def fetch_ohlcv_data(symbol: str, timeframe: str, limit: int) -> List[ChartCandle]:
-    if not settings.eodhd_api_key:
-        return _generate_mock_candles(symbol, timeframe, limit)
-
-    url = f"https://eodhistoricaldata.com/api/intraday/{symbol}"
-    params = {
-        "api_token": settings.eodhd_api_key,
-        "interval": timeframe,
-        "fmt": "json",
-    }
-
-    try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            payload = response.json()
-    except Exception:
-        return _generate_mock_candles(symbol, timeframe, limit)
-
-    if not isinstance(payload, list):
+    payload = await _fetch_payload(symbol, timeframe)
+    if payload is None:
         return _generate_mock_candles(symbol, timeframe, limit)
 
     candles: List[ChartCandle] = []
@@ -59,6 +43,45 @@ async def fetch_ohlcv_data(symbol: str, timeframe: str, limit: int) -> List[Char
     return candles
 
 
+async def fetch_candle_frame(symbol: str, timeframe: str, limit: int) -> CandleFrame:
+    """OHLCV history as a ``CandleFrame``, built straight from the upstream JSON."""
+
+    payload = await _fetch_payload(symbol, timeframe)
+    if payload is None:
+        return CandleFrame.from_records(candle.dict() for candle in _generate_mock_candles(symbol, timeframe, limit))
+    return candle_frame_from_payload(payload[-limit:])
+
+
+def candle_frame_from_payload(payload: List[dict]) -> CandleFrame:
+    """Convert EODHD intraday JSON rows to a ``CandleFrame`` with millisecond timestamps."""
+
+    return CandleFrame.from_records(
+        {**item, "timestamp": _parse_timestamp(item.get("datetime") or item.get("date"))} for item in payload
+    )
+
+
+async def _fetch_payload(symbol: str, timeframe: str) -> Optional[List[dict]]:
+    if not settings.eodhd_api_key:
+        return None
+
+    url = f"https://eodhistoricaldata.com/api/intraday/{symbol}"
+    params = {
+        "api_token": settings.eodhd_api_key,
+        "interval": timeframe,
+        "fmt": "json",
+    }
+
+    try:
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            response = await client.get(url, params=params)
+            response.raise_for_status()
+            payload = response.json()
+    except Exception:
+        return None
+
+    return payload if isinstance(payload, list) else None
+
+
 def build_support_resistance(candles: List[ChartCandle]) -> List[SupportResistanceLevel]:
     if not candles:
         return []
@@ -3,15 +3,15 @@ from __future__ import annotations
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from threading import Lock
-from typing import Dict, List, Tuple
+from typing import Dict
 
 import numpy as np
 
-from backend.order_block_detector import Candle, OrderBlockConfig, OrderBlockDetector
+from backend.order_block_detector import CandleFrame, OrderBlockConfig, OrderBlockDetector
 from backend.services.ml_service import run_nasdaq_signal, run_xauusd_signal
 from backend.services.pattern_analyzer import run_claude_pattern_analysis
 from backend.services.sentiment_analyzer import run_claude_sentiment
-from backend.services.rtyhiim_service import run_rtyhiim_detector
+from backend.services.rtyhiim_service import run_rtyhiim_detector_async
 
 
 @dataclass
@@ -111,7 +111,11 @@ class OrderBlockService:
             ml = run_nasdaq_signal()
         claude = run_claude_pattern_analysis("NDX.INDX", ["5m"])
         sentiment = await run_claude_sentiment()
-        rtyhiim = run_rtyhiim_detector(symbol, "1m")
+        try:
+            rtyhiim = await run_rtyhiim_detector_async(symbol, "1m")
+            rhythm = rtyhiim["state"]["pattern_type"]
+        except ValueError:
+            rhythm = "unavailable"
 
         confidence = (ml.confidence + sentiment.get("confidence", 0.0)) / 2
         action = "STRONG BUY" if ml.signal == "BUY" else "NEUTRAL"
@@ -123,28 +127,20 @@ class OrderBlockService:
                 "Order block detection active",
                 f"Claude patterns aligned: {list(claude['analyses'].keys())[0]}",
                 f"Market sentiment: {sentiment.get('sentiment', 'NEUTRAL')}",
-                f"RTYHIIM rhythm: {rtyhiim['state']['pattern_type']}",
+                f"RTYHIIM rhythm: {rhythm}",
             ],
         }
 
-    def _generate_candles(self, limit: int) -> List[Candle]:
+    def _generate_candles(self, limit: int) -> CandleFrame:
         prices = np.cumsum(np.random.normal(scale=0.8, size=limit)) + 21500
-        candles: List[Candle] = []
-        for idx in range(limit):
-            open_price = prices[idx]
-            close_price = prices[idx] + np.random.normal(scale=0.4)
-            high = max(open_price, close_price) + abs(np.random.normal(scale=0.3))
-            low = min(open_price, close_price) - abs(np.random.normal(scale=0.3))
-            candles.append(
-                Candle(
-                    timestamp=float(idx),
-                    open=float(open_price),
-                    high=float(high),
-                    low=float(low),
-                    close=float(close_price),
-                    volume=float(100 + np.random.randint(0, 50)),
-                )
-            )
-        return candles
+        close = prices + np.random.normal(scale=0.4, size=limit)
+        return CandleFrame(
+            timestamp=np.arange(limit),
+            open=prices,
+            high=np.maximum(prices, close) + np.abs(np.random.normal(scale=0.3, size=limit)),
+            low=np.minimum(prices, close) - np.abs(np.random.normal(scale=0.3, size=limit)),
+            close=close,
+            volume=100 + np.random.randint(0, 50, size=limit),
+        )
 
 service = OrderBlockService()
@@ -1,36 +1,244 @@
 from __future__ import annotations
 
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Dict
+from threading import Event, Lock, Thread
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import logging
+import re
 import sys
+import time
 
 import numpy as np
 
 from backend.models.rtyhiim import RtyhiimPrediction, RtyhiimResponse, RtyhiimState
 from backend.config import settings
 
+logger = logging.getLogger(__name__)
 
-def run_rtyhiim_detector(symbol: str, timeframe: str) -> Dict[str, object]:
-    """Run the RTYHIIM detector using the shared rhythm detector logic."""
 
-    state = _run_rhythm_engine()
+async def run_rtyhiim_detector_async(symbol: str, timeframe: str) -> Dict[str, object]:
+    """Return the registry's latest RTYHIIM state for ``symbol``.
+
+    Detection runs in the background ingestion loop, so a request is a
+    dictionary lookup. The first request for a symbol seeds its detector
+    and waits for one detection on the shared process pool. Raises
+    ``ValueError`` for a malformed symbol or timeframe.
+    """
+
+    entry = registry.get_or_create(symbol, timeframe)
+    if entry.state is None:
+        await registry.refresh()
+    state, age_s = registry.latest(symbol, timeframe)
     return {
         "symbol": symbol,
         "timeframe": timeframe,
         "state": state,
         "timestamp": datetime.utcnow().isoformat() + "Z",
+        "age_s": age_s,
     }
 
 
-def _run_rhythm_engine() -> Dict[str, object]:
-    detector = _build_detector()
-    prices = _generate_prices(600)
-    for idx, price in enumerate(prices):
-        detector.add_tick(float(price), timestamp=float(idx))
-    rhythm_state = detector.detect_wave_pattern()
-    decision = detector.should_trade()
+@dataclass
+class _RegistryEntry:
+    detector: object
+    last_timestamp: float
+    state: Optional[Dict[str, object]] = None
+    state_version: int = -1
+    updated_at: float = 0.0
+    checkpointer: Optional["RhythmCheckpointer"] = None
+
+
+class DetectorRegistry:
+    """Long-lived rhythm detectors keyed by ``(symbol, timeframe)``.
+
+    Detectors are created on first use, warm-started from their checkpoint
+    when checkpointing is enabled and otherwise seeded with one window of
+    history. ``ingest`` appends new ticks and ``refresh`` re-analyzes every
+    detector whose window changed, one batch per window length on the
+    shared process pool, and caches the resulting ``RtyhiimState``.
+
+    At most ``max_entries`` detectors are kept; creating another evicts
+    the least recently requested one. Its final checkpoint is written on
+    a background thread, so the request that caused the eviction does not
+    wait on the disk.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None) -> None:
+        self.max_entries = max(1, max_entries if max_entries is not None else settings.rtyhiim_max_detectors)
+        self._entries: "OrderedDict[Tuple[str, str], _RegistryEntry]" = OrderedDict()
+        self._retiring: Dict[Tuple[str, str], Thread] = {}
+        self._lock = Lock()
+
+    def keys(self) -> List[Tuple[str, str]]:
+        with self._lock:
+            return list(self._entries)
+
+    def get(self, symbol: str, timeframe: str) -> Optional[_RegistryEntry]:
+        """Entry for ``(symbol, timeframe)`` if registered, without marking it used."""
+
+        with self._lock:
+            return self._entries.get((symbol, timeframe))
+
+    def get_or_create(self, symbol: str, timeframe: str) -> _RegistryEntry:
+        """Entry for ``(symbol, timeframe)``, marking it most recently used.
+
+        Raises ``ValueError`` when either name is not a plain identifier.
+        """
+
+        _validate_key(symbol, timeframe)
+        key = (symbol, timeframe)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                pending = self._retiring.pop(key, None)
+                if pending is not None:
+                    # Let the evicted detector's final checkpoint land before restoring from it.
+                    pending.join()
+                entry = self._entries[key] = self._create(symbol, timeframe)
+                while len(self._entries) > self.max_entries:
+                    old_key, old = self._entries.popitem(last=False)
+                    if old.checkpointer is not None:
+                        thread = Thread(target=old.checkpointer.stop, name=f"rhythm-evict-{old_key[0]}", daemon=True)
+                        thread.start()
+                        self._retiring[old_key] = thread
+            else:
+                self._entries.move_to_end(key)
+        return entry
+
+    def ingest(self, symbol: str, timeframe: str, prices: np.ndarray, timestamps: np.ndarray) -> None:
+        """Append ticks to the detector for ``(symbol, timeframe)`` if it is registered."""
+
+        entry = self.get(symbol, timeframe)
+        if entry is not None and len(prices):
+            entry.detector.add_ticks(prices, timestamps)
+            entry.last_timestamp = float(timestamps[-1])
+
+    async def refresh(self) -> int:
+        """Re-detect every stale detector; return how many were analyzed."""
+
+        from rhythm_detector_v2 import trade_decision
+
+        stale: Dict[int, List[Tuple[_RegistryEntry, int, np.ndarray]]] = {}
+        for key in self.keys():
+            entry = self.get(*key)
+            if entry is None:
+                continue
+            version, window = entry.detector.window()
+            if version != entry.state_version:
+                stale.setdefault(window.size, []).append((entry, version, window))
+        if not stale:
+            return 0
+
+        executor = _get_executor()
+        groups = list(stale.values())
+        futures = [executor.submit(np.stack([window for _, _, window in group])) for group in groups]
+        for group, states in zip(groups, await asyncio.gather(*map(asyncio.wrap_future, futures))):
+            for (entry, version, window), state in zip(group, states):
+                current = float(window[-1]) if window.size else 0.0
+                decision = trade_decision(state, executor.config, current)
+                entry.state = _to_response_state(state.as_dict(), decision)
+                entry.state_version = version
+                entry.updated_at = time.monotonic()
+        return sum(len(group) for group in groups)
+
+    def latest(self, symbol: str, timeframe: str) -> Tuple[Optional[Dict[str, object]], Optional[float]]:
+        """Cached state for ``(symbol, timeframe)`` and its age in seconds."""
+
+        entry = self.get(symbol, timeframe)
+        if entry is None or entry.state is None:
+            return None, None
+        return entry.state, time.monotonic() - entry.updated_at
+
+    def close(self) -> None:
+        """Stop checkpointing and forget every detector."""
+
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+            retiring = list(self._retiring.values())
+            self._retiring.clear()
+        for entry in entries:
+            if entry.checkpointer is not None:
+                entry.checkpointer.stop()
+        for thread in retiring:
+            thread.join()
+
+    def _create(self, symbol: str, timeframe: str) -> _RegistryEntry:
+        now = time.time()
+        path = checkpoint_path(symbol, timeframe)
+        detector = restore_detector(path, resume_at=now) if path is not None else _build_detector()
+        if not detector.window()[1].size:
+            history = _generate_prices(detector.maxlen, end=now, tick_rate_hz=detector.config.tick_rate_hz)
+            detector.add_ticks(*history)
+        entry = _RegistryEntry(detector=detector, last_timestamp=now)
+        if path is not None:
+            entry.checkpointer = RhythmCheckpointer(detector, path).start()
+        return entry
+
+
+registry = DetectorRegistry()
+
+
+async def run_ingestion(interval_s: Optional[float] = None) -> None:
+    """Feed every registered detector and refresh its cached state, forever.
+
+    Each cycle appends the ticks that arrived since the previous one and
+    runs ``DetectorRegistry.refresh``. Failures are logged per detector and
+    per refresh, so one bad symbol never ends the loop. Cancel the task to
+    stop.
+    """
+
+    interval_s = interval_s if interval_s is not None else settings.rtyhiim_ingest_interval_s
+    while True:
+        now = time.time()
+        for symbol, timeframe in registry.keys():
+            entry = registry.get(symbol, timeframe)
+            if entry is None:
+                continue
+            try:
+                prices, timestamps = _generate_prices(
+                    end=now, start=entry.last_timestamp, tick_rate_hz=entry.detector.config.tick_rate_hz
+                )
+                registry.ingest(symbol, timeframe, prices, timestamps)
+            except Exception:
+                logger.exception("rhythm ingestion for %s %s failed", symbol, timeframe)
+        try:
+            await registry.refresh()
+        except Exception:
+            logger.exception("rhythm registry refresh failed")
+        await asyncio.sleep(interval_s)
+
+
+def shutdown_executor() -> None:
+    """Stop the rhythm worker pool if it was started."""
+
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+
+
+_executor = None
+_executor_lock = Lock()
+
 
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _ensure_repo_on_path()
+            from rhythm_executor import RhythmExecutor
+
+            _executor = RhythmExecutor(_build_config(), max_workers=settings.rtyhiim_workers or None)
+        return _executor
+
+
+def _to_response_state(rhythm_state: Dict[str, object], decision: Dict[str, object]) -> Dict[str, object]:
     predictions = []
     for horizon in ("30s", "60s", "120s"):
         value = rhythm_state.get("predictions", {}).get(horizon)
@@ -57,34 +265,133 @@ def _run_rhythm_engine() -> Dict[str, object]:
     ).dict()
 
 
-def _build_detector():
+class RhythmCheckpointer:
+    """Background thread that periodically snapshots a detector to disk.
+
+    A snapshot is written only when ticks arrived since the previous one,
+    and once more on ``stop`` so a clean shutdown loses nothing. Pair it
+    with ``restore_detector`` at startup to resume analysis immediately.
+    """
+
+    def __init__(self, detector, path: str | Path, interval_s: Optional[float] = None) -> None:
+        self.detector = detector
+        self.path = Path(path).expanduser()
+        self.interval_s = interval_s if interval_s is not None else settings.rtyhiim_checkpoint_interval_s
+        self._saved_version = -1
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+
+    def start(self) -> "RhythmCheckpointer":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._thread = Thread(target=self._run, name=f"rhythm-checkpoint-{self.path.stem}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        try:
+            self.checkpoint()
+        except Exception:
+            logger.exception("final rhythm checkpoint to %s failed", self.path)
+
+    def checkpoint(self) -> bool:
+        """Save now if the detector changed; return whether a file was written."""
+
+        version = self.detector.version
+        if version == self._saved_version:
+            return False
+        self.detector.save_state(self.path)
+        self._saved_version = version
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.checkpoint()
+            except Exception:
+                logger.exception("rhythm checkpoint to %s failed", self.path)
+
+
+def checkpoint_path(symbol: str, timeframe: str) -> Optional[Path]:
+    """Checkpoint file for ``(symbol, timeframe)``, or None when checkpointing is disabled."""
+
+    _validate_key(symbol, timeframe)
+    if not settings.rtyhiim_checkpoint_dir:
+        return None
+    return Path(settings.rtyhiim_checkpoint_dir).expanduser() / f"{symbol}_{timeframe}.rhythm"
+
+
+_KEY_PATTERN = re.compile(r"[A-Za-z0-9][A-Za-z0-9.\-]{0,31}")
+
+
+def _validate_key(symbol: str, timeframe: str) -> None:
+    for name, value in (("symbol", symbol), ("timeframe", timeframe)):
+        if not isinstance(value, str) or not _KEY_PATTERN.fullmatch(value):
+            raise ValueError(f"invalid rhythm {name}: {value!r}")
+
+
+def restore_detector(path: str | Path, resume_at: Optional[float] = None):
+    """Build a detector from settings, warm-started from ``path`` when it exists."""
+
+    detector = _build_detector()
+    path = Path(path).expanduser()
+    if path.exists():
+        try:
+            detector.load_state(path, resume_at=time.time() if resume_at is None else resume_at)
+        except (OSError, ValueError):
+            logger.warning("ignoring unusable rhythm checkpoint %s", path, exc_info=True)
+            detector = _build_detector()
+    return detector
+
+
+def _ensure_repo_on_path() -> None:
     repo_root = Path(__file__).resolve().parents[2]
     if str(repo_root) not in sys.path:
         sys.path.append(str(repo_root))
-    try:
-        from rhythm_detector_v2 import RhythmDetector, RhythmConfig
-
-        return RhythmDetector(
-            RhythmConfig(
-                window_seconds=settings.rtyhiim_window_seconds,
-                tick_rate_hz=settings.rtyhiim_tick_rate_hz,
-                min_period_s=settings.rtyhiim_min_period_s,
-                max_period_s=settings.rtyhiim_max_period_s,
-            )
-        )
-    except Exception:
-        from rhythm_detector import RhythmDetector, RhythmConfig
-
-        return RhythmDetector(
-            RhythmConfig(
-                window_seconds=settings.rtyhiim_window_seconds,
-                tick_rate_hz=settings.rtyhiim_tick_rate_hz,
-                min_period_s=settings.rtyhiim_min_period_s,
-                max_period_s=settings.rtyhiim_max_period_s,
-            )
-        )
 
 
-def _generate_prices(length: int) -> np.ndarray:
-    t = np.arange(length)
-    return 100 + np.sin(2 * np.pi * (1 / 60) * t) + np.random.normal(scale=0.3, size=length)
+def _build_config():
+    from rhythm_detector_v2 import RhythmConfig
+
+    return RhythmConfig(
+        window_seconds=settings.rtyhiim_window_seconds,
+        tick_rate_hz=settings.rtyhiim_tick_rate_hz,
+        min_period_s=settings.rtyhiim_min_period_s,
+        max_period_s=settings.rtyhiim_max_period_s,
+    )
+
+
+def _build_detector():
+    _ensure_repo_on_path()
+    from rhythm_detector_v2 import RhythmDetector
+
+    return RhythmDetector(_build_config())
+
+
+def _generate_prices(
+    length: Optional[int] = None,
+    end: Optional[float] = None,
+    start: Optional[float] = None,
+    tick_rate_hz: float = 1.0,
+):
+    """Synthetic 60 s sine feed plus noise.
+
+    With only ``length``, return that many prices. With ``end``, return
+    ``(prices, timestamps)`` for the ticks strictly after ``start`` up to
+    ``end`` on the ``tick_rate_hz`` grid, or the ``length`` ticks ending
+    at ``end`` when ``start`` is omitted.
+    """
+
+    if end is None:
+        t = np.arange(length)
+        return 100 + np.sin(2 * np.pi * (1 / 60) * t) + np.random.normal(scale=0.3, size=length)
+
+    step = 1.0 / tick_rate_hz
+    last = np.floor(end / step)
+    first = last - length + 1 if start is None else np.floor(start / step) + 1
+    timestamps = np.arange(first, last + 1) * step
+    prices = 100 + np.sin(2 * np.pi * (1 / 60) * timestamps) + np.random.normal(scale=0.3, size=timestamps.size)
+    return prices, timestamps
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import List
+import math
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from rhythm_detector_v2 import RhythmBank, RhythmConfig, RhythmState, TemplateLibrary, trade_decision
+
+
+@dataclass
+class BacktestResult:
+    win_rate: float
+    sharpe: float
+    max_drawdown: float
+    trades: int
+    eval_index: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=int), repr=False)
+    direction: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype="<U4"), repr=False)
+    returns: np.ndarray = field(default_factory=lambda: np.zeros(0), repr=False)
+
+
+def walk_forward_backtest(
+    prices: np.ndarray,
+    config: RhythmConfig | None = None,
+    step: int = 10,
+    warmup: int = 100,
+    horizon: int = 60,
+    batch_size: int = 256,
+    templates: TemplateLibrary | None = None,
+    executor=None,
+) -> BacktestResult:
+    """Replay the rhythm strategy over a 1 tick-per-sample price series.
+
+    Equivalent to feeding every price to ``RhythmDetector.add_tick`` and
+    calling ``should_trade`` at every ``step``-th tick after ``warmup``,
+    but every evaluation window is taken at once from
+    ``sliding_window_view`` and analyzed in batches by ``RhythmBank``.
+    While the detector window is still filling, each evaluation has its
+    own window length and is analyzed on its own.
+
+    Parameters
+    ----------
+    prices : np.ndarray
+        Price series sampled at ``config.tick_rate_hz`` with no gaps.
+    config : RhythmConfig, optional
+        Detector configuration; ``incremental_spectrum`` is ignored and the
+        full-FFT path is used.
+    step : int
+        Ticks between evaluations.
+    warmup : int
+        Evaluations start at the first multiple of ``step`` above this.
+    horizon : int
+        Holding period in ticks for each trade.
+    batch_size : int
+        Windows analyzed per ``RhythmBank.analyze`` call.
+    templates : TemplateLibrary, optional
+        Waveform templates for classification.
+    executor : RhythmExecutor, optional
+        Spread the batches over a process pool instead of running inline.
+
+    Returns
+    -------
+    BacktestResult
+        Aggregate metrics plus the evaluation index, direction and return
+        of every trade.
+    """
+
+    config = config or RhythmConfig()
+    prices = np.ascontiguousarray(prices, dtype=np.float64)
+    maxlen = int(config.window_seconds * config.tick_rate_hz)
+    bank = RhythmBank([], config, templates)
+
+    evals = np.arange(0, prices.size, step)
+    evals = evals[evals > warmup]
+    states = _warmup_states(bank, prices, evals[evals < maxlen - 1])
+    full = evals[evals >= maxlen - 1]
+    if full.size:
+        windows = sliding_window_view(prices, maxlen)
+        batches = [full[start : start + batch_size] for start in range(0, full.size, batch_size)]
+        if executor is not None:
+            futures = [executor.submit(windows[batch - maxlen + 1]) for batch in batches]
+            for future in futures:
+                states.extend(future.result())
+        else:
+            for batch in batches:
+                states.extend(bank.analyze(windows[batch - maxlen + 1]))
+
+    decisions = [trade_decision(state, config, float(prices[idx])) for state, idx in zip(states, evals)]
+    should = np.array([decision["should_trade"] for decision in decisions], dtype=bool)
+    direction = np.array([decision["direction"] for decision in decisions], dtype="<U4")
+    traded = should & (evals + horizon < prices.size)
+    index = evals[traded]
+    sign = np.where(direction[traded] == "SELL", -1.0, 1.0)
+    returns = sign * (prices[index + horizon] - prices[index]) / prices[index]
+    return _summarize(returns, index, direction[traded])
+
+
+def _warmup_states(bank: RhythmBank, prices: np.ndarray, evals: np.ndarray) -> List[RhythmState]:
+    return [bank.analyze(prices[None, : idx + 1])[0] for idx in evals]
+
+
+def _summarize(returns: np.ndarray, index: np.ndarray, direction: np.ndarray) -> BacktestResult:
+    if returns.size == 0:
+        return BacktestResult(0.0, 0.0, 0.0, 0)
+
+    equity = np.cumprod(1.0 + returns)
+    peak = np.maximum.accumulate(np.maximum(equity, 1.0))
+    drawdown = (peak - equity) / peak
+    with np.errstate(invalid="ignore", divide="ignore"):
+        spread = np.std(returns, ddof=1) if returns.size > 1 else math.nan
+    return BacktestResult(
+        win_rate=float(np.mean(returns > 0)),
+        sharpe=float(np.mean(returns) / (spread + 1e-9) * math.sqrt(252)),
+        max_drawdown=float(np.max(drawdown)),
+        trades=int(returns.size),
+        eval_index=index,
+        direction=direction,
+        returns=returns,
+    )
+
+
+__all__ = ["BacktestResult", "walk_forward_backtest"]
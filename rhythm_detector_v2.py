@@ -1,15 +1,23 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from collections import deque
-from typing import Deque, Dict, List, Optional, Tuple
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass
+from typing import Callable, Deque, Dict, Hashable, List, Optional, Sequence, Tuple, TypeVar
+import bisect
+import hashlib
+import json
 import math
+import os
+import struct
 import threading
+import time
 
 import numpy as np
-import pandas as pd
-from scipy.signal import detrend, hilbert, sawtooth, windows, find_peaks
-from scipy.stats import norm
+from numpy.lib.stride_tricks import sliding_window_view
+
+from ring_buffer import RingBuffer
+
+T = TypeVar("T")
 
 
 @dataclass
@@ -40,6 +48,21 @@ class RhythmConfig:
         Maximum gap before resetting the buffer.
     fill_gaps : bool
         Whether to fill small gaps using last price.
+    dtw_band : int, optional
+        Sakoe-Chiba band half-width for DTW matching, in downsampled
+        samples. ``None`` leaves the warping path unconstrained.
+    incremental_spectrum : bool
+        Maintain a sliding DFT over the rhythm band in ``add_tick`` and read
+        the dominant frequency and its harmonics from it once the window is
+        full. The regularity score still needs one zero-padded FFT per
+        detection, so this mainly speeds up per-tick ``spectral_energy``.
+    spectrum_resync_ticks : int
+        Number of sliding updates between full-FFT resynchronizations.
+    forecast_horizons_s : tuple of float
+        Prediction horizons in seconds.
+    precompute_cache_size : int
+        Entries kept in each detector's LRU cache of frequency grids,
+        regression axes and waveform templates.
     """
 
     window_seconds: int = 900
@@ -53,6 +76,11 @@ class RhythmConfig:
     dtw_downsample: int = 4
     max_gap_s: float = 10.0
     fill_gaps: bool = True
+    dtw_band: Optional[int] = None
+    incremental_spectrum: bool = False
+    spectrum_resync_ticks: int = 300
+    forecast_horizons_s: Tuple[float, ...] = (30, 60, 120)
+    precompute_cache_size: int = 64
 
 
 @dataclass
@@ -91,25 +119,648 @@ class RhythmState:
         }
 
 
+class SlidingDFT:
+    """Sliding DFT of a fixed-length window over a contiguous range of bins.
+
+    Each update costs O(bins). Values are stored relative to a reference
+    level fixed at the last resync, which only affects the DC bin, and the
+    running sums needed for a linear detrend are maintained alongside the
+    spectrum. ``band_magnitudes`` applies the detrend and a periodic Hann
+    window in the frequency domain, so the result matches a windowed FFT of
+    the detrended buffer without touching the time series.
+
+    Parameters
+    ----------
+    length : int
+        Window length in samples.
+    bins : np.ndarray
+        Contiguous DFT bin indices to track. The first and last bins are only
+        used as neighbours for the Hann window.
+    resync_every : int
+        Number of updates after which ``needs_resync`` reports True.
+    """
+
+    def __init__(self, length: int, bins: np.ndarray, resync_every: int) -> None:
+        self.length = length
+        self.bins = np.asarray(bins, dtype=np.int64)
+        self.resync_every = max(1, int(resync_every))
+        self._twiddle = np.exp(2j * np.pi * self.bins / length)
+        self._ramp = self._ramp_spectrum(self.bins)
+        self._positions = np.arange(length)
+        self._spectrum = np.zeros(self.bins.size, dtype=np.complex128)
+        self._ref = 0.0
+        self._sum = 0.0
+        self._weighted = 0.0
+        self._updates = 0
+        self.ready = False
+
+    def reset(self) -> None:
+        self.ready = False
+
+    def needs_resync(self) -> bool:
+        return self._updates >= self.resync_every
+
+    def resync(self, window: np.ndarray) -> None:
+        """Rebuild the tracked bins from a full FFT of ``window``."""
+
+        self._ref = float(np.mean(window))
+        centered = np.asarray(window, dtype=np.float64) - self._ref
+        self._spectrum = np.fft.fft(centered)[self.bins % self.length]
+        self._sum = float(np.sum(centered))
+        self._weighted = float(np.dot(self._positions, centered))
+        self._updates = 0
+        self.ready = True
+
+    def update(self, new: float, old: float) -> None:
+        """Slide the window by one sample: ``old`` leaves and ``new`` enters."""
+
+        new -= self._ref
+        old -= self._ref
+        self._spectrum = (self._spectrum + (new - old)) * self._twiddle
+        self._weighted += (self.length - 1) * new - (self._sum - old)
+        self._sum += new - old
+        self._updates += 1
+
+    def band_magnitudes(self) -> np.ndarray:
+        """Detrended, Hann-windowed magnitudes for ``bins[1:-1]``."""
+
+        return self._shape(self._spectrum, self._ramp, self._slope(self._sum, self._weighted))
+
+    def magnitudes_at(
+        self, window: np.ndarray, centers: np.ndarray, cache: Optional["PrecomputeCache"] = None
+    ) -> np.ndarray:
+        """Evaluate the same spectrum directly from ``window`` at ``centers``.
+
+        Used for the handful of harmonic bins outside the tracked band. The
+        three DFT rows around each center are evaluated with one matrix
+        product; the basis depends only on the centers, which follow the
+        dominant frequency, so it is kept in ``cache`` when one is given.
+        """
+
+        centered = np.asarray(window, dtype=np.float64) - float(np.mean(window))
+        centers = np.asarray(centers, dtype=np.int64)
+        basis, ramp = _precomputed(
+            cache, ("sdft_basis", self.length, tuple(centers.tolist())), lambda: self._basis(centers)
+        )
+        slope = self._slope(float(np.sum(centered)), float(np.dot(self._positions, centered)))
+        spectrum = (basis @ centered).reshape(-1, 3)
+        detrended = spectrum - slope * ramp
+        detrended[ramp == 0] = 0.0
+        return np.abs(0.5 * detrended[:, 1] - 0.25 * (detrended[:, 0] + detrended[:, 2]))
+
+    def _basis(self, centers: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        bins = (centers[:, None] + np.arange(-1, 2)).ravel()
+        basis = np.exp(-2j * np.pi * np.outer(bins, self._positions) / self.length)
+        return basis, self._ramp_spectrum(bins).reshape(-1, 3)
+
+    def _slope(self, total: float, weighted: float) -> float:
+        n = self.length
+        sum_x = n * (n - 1) / 2.0
+        sum_xx = (n - 1) * n * (2 * n - 1) / 6.0
+        return (n * weighted - sum_x * total) / (n * sum_xx - sum_x**2)
+
+    def _ramp_spectrum(self, bins: np.ndarray) -> np.ndarray:
+        # DFT of the index ramp 0..N-1 at each bin: N / (w - 1) with
+        # w = exp(-2j*pi*k/N). The DC entry is unused because a linear
+        # detrend always leaves a zero-mean residual.
+        w = np.exp(-2j * np.pi * bins / self.length)
+        ramp = np.zeros(len(bins), dtype=np.complex128)
+        nonzero = bins % self.length != 0
+        ramp[nonzero] = self.length / (w[nonzero] - 1.0)
+        return ramp
+
+    def _shape(self, spectrum: np.ndarray, ramp: np.ndarray, slope: float) -> np.ndarray:
+        detrended = spectrum - slope * ramp
+        detrended[ramp == 0] = 0.0
+        windowed = 0.5 * detrended[1:-1] - 0.25 * (detrended[:-2] + detrended[2:])
+        return np.abs(windowed)
+
+
+class RollingMedianMAD:
+    """Median and median absolute deviation of a sliding window.
+
+    Window values are kept in a sorted list maintained with ``bisect``, so
+    insertions and removals are a binary search plus a C-level memmove. The
+    median is read in O(1). The MAD is the middle element of two sorted
+    deviation sequences, the values below the median and those above it,
+    which a binary search selects in O(log n). Both statistics are bit-identical
+    to ``np.median`` over the same window.
+    """
+
+    def __init__(self) -> None:
+        self._values: List[float] = []
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def add(self, value: float) -> None:
+        bisect.insort(self._values, value)
+
+    def remove(self, value: float) -> None:
+        del self._values[bisect.bisect_left(self._values, value)]
+
+    def clear(self) -> None:
+        self._values.clear()
+
+    def rebuild(self, values: np.ndarray) -> None:
+        self._values = sorted(np.asarray(values, dtype=np.float64).tolist())
+
+    def median(self) -> float:
+        values = self._values
+        mid = len(values) // 2
+        if len(values) % 2:
+            return values[mid]
+        return (values[mid - 1] + values[mid]) / 2.0
+
+    def mad(self) -> float:
+        values = self._values
+        count = len(values)
+        median = self.median()
+        split = bisect.bisect_left(values, median)
+        mid = count // 2
+        if count % 2:
+            return self._kth_deviation(mid, median, split)
+        return (self._kth_deviation(mid - 1, median, split) + self._kth_deviation(mid, median, split)) / 2.0
+
+    def _kth_deviation(self, k: int, median: float, split: int) -> float:
+        # Deviations below the median, ascending: median - values[split-1-i].
+        # Deviations at or above it, ascending: values[split+j] - median.
+        values = self._values
+        below = split
+        above = len(values) - split
+        lo = max(0, k + 1 - above)
+        hi = min(k + 1, below)
+        while lo < hi:
+            take = (lo + hi) // 2
+            if median - values[split - 1 - take] < values[split + k - take] - median:
+                lo = take + 1
+            else:
+                hi = take
+        candidates = []
+        if lo > 0:
+            candidates.append(median - values[split - lo])
+        if k + 1 - lo > 0:
+            candidates.append(values[split + k - lo] - median)
+        return max(candidates)
+
+
+class PrecomputeCache:
+    """Bounded LRU cache for setup arrays that depend only on shapes.
+
+    Frequency grids, band masks, regression axes and waveform templates are
+    functions of the window length, tick rate and dominant frequency bin.
+    Each detector owns one cache, so once the window is full steady-state
+    detection reuses them instead of rebuilding them per call. Cached
+    arrays are shared and must be treated as read-only.
+
+    Parameters
+    ----------
+    maxsize : int
+        Maximum number of entries before the least recently used is evicted.
+    """
+
+    def __init__(self, maxsize: int = 64) -> None:
+        self.maxsize = max(1, maxsize)
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, object] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, factory: Callable[[], T]) -> T:
+        """Return the entry for ``key``, building it with ``factory`` on a miss."""
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        value = factory()
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class RollingExtrema:
+    """Minimum and maximum of the last ``span`` values.
+
+    Two monotonic deques hold the candidates for each extreme, so every
+    value is pushed and popped at most once and both reads are O(1).
+
+    Parameters
+    ----------
+    span : int
+        Number of most recent values covered.
+    """
+
+    def __init__(self, span: int) -> None:
+        self.span = span
+        self._count = 0
+        self._lows: Deque[Tuple[int, float]] = deque()
+        self._highs: Deque[Tuple[int, float]] = deque()
+
+    def add(self, value: float) -> None:
+        index = self._count
+        self._count += 1
+        while self._lows and self._lows[-1][1] >= value:
+            self._lows.pop()
+        while self._highs and self._highs[-1][1] <= value:
+            self._highs.pop()
+        self._lows.append((index, value))
+        self._highs.append((index, value))
+        expired = index - self.span
+        if self._lows[0][0] <= expired:
+            self._lows.popleft()
+        if self._highs[0][0] <= expired:
+            self._highs.popleft()
+
+    def clear(self) -> None:
+        self._count = 0
+        self._lows.clear()
+        self._highs.clear()
+
+    def rebuild(self, values: np.ndarray) -> None:
+        self.clear()
+        for value in np.asarray(values, dtype=np.float64)[-self.span :].tolist():
+            self.add(value)
+
+    def min(self) -> float:
+        return self._lows[0][1]
+
+    def max(self) -> float:
+        return self._highs[0][1]
+
+
+@dataclass
+class _Snapshot:
+    """Consistent copy of the detector state taken by one reader."""
+
+    version: int
+    prices: Optional[np.ndarray] = None
+    median: float = 0.0
+    mad: float = 0.0
+    band: Optional[np.ndarray] = None
+    trend_slope: float = 0.0
+    support: Optional[float] = None
+    resistance: Optional[float] = None
+
+
+class DetectionPolicy:
+    """Decides when ``RhythmDetector.refresh`` reruns detection.
+
+    The base policy re-detects whenever a tick has arrived since the last
+    detection. Subclasses add cheaper criteria on top of that check.
+    """
+
+    def due(self, detector: "RhythmDetector") -> bool:
+        return detector.version != detector.detected_version
+
+    def record(self, detector: "RhythmDetector") -> None:
+        """Called after each detection run."""
+
+
+class EveryNTicks(DetectionPolicy):
+    """Re-detect once ``ticks`` new ticks have arrived."""
+
+    def __init__(self, ticks: int) -> None:
+        self.ticks = max(1, int(ticks))
+
+    def due(self, detector: "RhythmDetector") -> bool:
+        return detector.version - detector.detected_version >= self.ticks
+
+
+class TimeBudget(DetectionPolicy):
+    """Re-detect at most once every ``interval_s`` seconds of wall time."""
+
+    def __init__(self, interval_s: float) -> None:
+        self.interval_s = interval_s
+        self._last_run = -math.inf
+
+    def due(self, detector: "RhythmDetector") -> bool:
+        return super().due(detector) and time.monotonic() - self._last_run >= self.interval_s
+
+    def record(self, detector: "RhythmDetector") -> None:
+        self._last_run = time.monotonic()
+
+
+class SpectralChange(DetectionPolicy):
+    """Re-detect when spectral energy moves by more than ``threshold``.
+
+    Energy is read from ``RhythmDetector.spectral_energy``, which is O(1) or
+    O(bins), and compared relative to its value at the last detection.
+    """
+
+    def __init__(self, threshold: float) -> None:
+        self.threshold = threshold
+        self._reference: Optional[float] = None
+
+    def due(self, detector: "RhythmDetector") -> bool:
+        if not super().due(detector):
+            return False
+        if self._reference is None or self._reference <= 0:
+            return True
+        change = abs(detector.spectral_energy() - self._reference) / self._reference
+        return change > self.threshold
+
+    def record(self, detector: "RhythmDetector") -> None:
+        self._reference = detector.spectral_energy()
+
+
+@dataclass
+class TemplateStats:
+    """Running counters of a ``TemplateLibrary``'s candidate pruning.
+
+    ``candidates`` counts (row, template) pairs considered. Each one ends up
+    either ``pruned`` by its lower bound before any DTW, ``abandoned`` part
+    way through DTW once it could no longer win, or scored with a ``full``
+    DTW.
+    """
+
+    rows: int = 0
+    candidates: int = 0
+    pruned: int = 0
+    abandoned: int = 0
+    full: int = 0
+
+    def as_dict(self) -> Dict[str, float]:
+        rejected = self.pruned + self.abandoned
+        return {
+            "rows": self.rows,
+            "candidates": self.candidates,
+            "pruned": self.pruned,
+            "abandoned": self.abandoned,
+            "full": self.full,
+            "rejection_rate": rejected / self.candidates if self.candidates else 0.0,
+        }
+
+
+def _square(radians: np.ndarray) -> np.ndarray:
+    return np.where(np.mod(radians, 2 * np.pi) < np.pi, 1.0, -1.0)
+
+
+def _skewed_sawtooth(radians: np.ndarray) -> np.ndarray:
+    return _sawtooth(radians, 0.8)
+
+
+def _damped_sine(radians: np.ndarray) -> np.ndarray:
+    # Decays by a factor of e every four cycles.
+    return np.exp(-radians / (8 * np.pi)) * np.sin(radians)
+
+
+def _multi_harmonic(radians: np.ndarray) -> np.ndarray:
+    return (np.sin(radians) + 0.5 * np.sin(2 * radians) + 0.25 * np.sin(3 * radians)) / 1.75
+
+
+def _triangle(radians: np.ndarray) -> np.ndarray:
+    return _sawtooth(radians, 0.5)
+
+
+class TemplateLibrary:
+    """Waveform templates matched by correlation and DTW, with pruning.
+
+    Each template is scored as ``0.6 * corr + 0.4 / (1 + dtw / (2 * m))``.
+    Correlations are cheap and computed for every candidate. DTW is not:
+    candidates are visited in order of an optimistic score built from a
+    lower bound on their DTW distance (LB_Keogh against the template's
+    Sakoe-Chiba envelope, or the first/last-cell bound if larger). A
+    candidate whose optimistic score cannot beat the row's best so far is
+    pruned without any DTW, and the rest run DTW with a cutoff that
+    abandons them as soon as they can no longer win. The winner and its
+    score are the same as exhaustive matching.
+
+    Parameters
+    ----------
+    shapes : dict, optional
+        Template name to a function mapping phase in radians to one
+        waveform. Defaults to sine, sawtooth and triangle.
+
+    Core API:
+    - add(name, shape)
+    - classify(data, dominant, config)
+    - stats / reset_stats()
+    """
+
+    def __init__(self, shapes: Optional[Dict[str, Callable[[np.ndarray], np.ndarray]]] = None) -> None:
+        self.shapes: Dict[str, Callable[[np.ndarray], np.ndarray]] = dict(
+            shapes or {"sine": np.sin, "sawtooth": _sawtooth, "triangle": _triangle}
+        )
+        self.stats = TemplateStats()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def extended(cls) -> "TemplateLibrary":
+        """Default shapes plus square, skewed saw, damped and multi-harmonic."""
+
+        library = cls()
+        library.add("square", _square)
+        library.add("skewed_sawtooth", _skewed_sawtooth)
+        library.add("damped_sine", _damped_sine)
+        library.add("multi_harmonic", _multi_harmonic)
+        return library
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        return tuple(self.shapes)
+
+    def add(self, name: str, shape: Callable[[np.ndarray], np.ndarray]) -> None:
+        """Register a template; replaces any template with the same name."""
+
+        self.shapes[name] = shape
+        self._generation += 1
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.stats = TemplateStats()
+
+    def render(self, n: int, tick_rate_hz: float, frequency: float) -> np.ndarray:
+        """All templates at ``frequency`` sampled over ``n`` ticks, as ``(templates, n)``."""
+
+        radians = 2 * np.pi * frequency * (np.arange(n) / tick_rate_hz)
+        return np.stack([shape(radians) for shape in self.shapes.values()])
+
+    def classify(
+        self,
+        data: np.ndarray,
+        dominant: np.ndarray,
+        config: RhythmConfig,
+        cache: Optional[PrecomputeCache] = None,
+        exhaustive: bool = False,
+    ) -> Tuple[List[str], np.ndarray]:
+        """Best-matching template name and its clipped score per row.
+
+        Parameters
+        ----------
+        data : np.ndarray
+            Detrended windows of shape ``(rows, n)``.
+        dominant : np.ndarray
+            Dominant frequency per row; rows at zero are ``"irregular"``.
+        config : RhythmConfig
+            Supplies the tick rate, DTW downsampling and band.
+        cache : PrecomputeCache, optional
+            Holds rendered templates and envelopes per frequency bin.
+        exhaustive : bool
+            Score every candidate with a full DTW, bypassing pruning.
+
+        Returns
+        -------
+        tuple
+            Template names and confidences, one per row.
+        """
+
+        rows, n = data.shape
+        names = ["irregular"] * rows
+        confidence = np.zeros(rows)
+        active = np.flatnonzero(dominant > 0)
+        if active.size == 0:
+            return names, confidence
+
+        down = max(1, config.dtw_downsample)
+        series = data[active]
+        sampled = series[:, ::down]
+        m = sampled.shape[1]
+        radius = m if config.dtw_band is None else int(config.dtw_band)
+
+        frequencies, inverse = np.unique(dominant[active], return_inverse=True)
+        per_bin = [
+            _precomputed(
+                cache,
+                ("templates", id(self), self._generation, n, config.tick_rate_hz, float(frequency), down, radius),
+                lambda frequency=frequency: self._prepare(n, config.tick_rate_hz, frequency, down, radius),
+            )
+            for frequency in frequencies
+        ]
+        # (templates, rows, length) views of the per-bin arrays.
+        full, reduced, upper, lower = (
+            np.stack([entry[part] for entry in per_bin])[inverse].transpose(1, 0, 2) for part in range(4)
+        )
+        count = full.shape[0]
+        corr = np.stack([_corr_rows(series, template) for template in full])
+        columns = np.arange(active.size)
+        best_score = np.full(active.size, -np.inf)
+        best_index = np.zeros(active.size, dtype=int)
+        abandoned = scored = 0
+
+        if exhaustive:
+            bound = np.zeros((count, active.size))
+        else:
+            # Shrink the bound slightly so rounding never lets it exceed the true distance.
+            bound = _dtw_lower_bound(sampled, reduced, upper, lower) * (1.0 - 1e-9)
+        optimistic = 0.6 * corr + 0.4 / (1.0 + bound / (2 * m))
+        order = np.argsort(-optimistic, axis=0, kind="stable")
+
+        for rank in range(count):
+            candidate = order[rank]
+            ceiling = optimistic[candidate, columns]
+            live = (ceiling > best_score) | ((ceiling == best_score) & (candidate < best_index))
+            if exhaustive:
+                live[:] = True
+            if not live.any():
+                break
+            idx = np.flatnonzero(live)
+            chosen = candidate[idx]
+            c = corr[chosen, idx]
+            cutoff = None
+            if not exhaustive:
+                margin = best_score[idx] - 0.6 * c
+                with np.errstate(divide="ignore"):
+                    cutoff = np.where(margin > 0, 2 * m * (0.4 / margin - 1.0), np.inf) * (1.0 + 1e-9)
+            distance = dtw_distance(sampled[idx], reduced[chosen, idx], band=config.dtw_band, cutoff=cutoff)
+            dropped = np.isinf(distance)
+            abandoned += int(np.count_nonzero(dropped))
+            scored += int(idx.size - np.count_nonzero(dropped))
+            score = np.where(dropped, -np.inf, 0.6 * c + 0.4 / (1.0 + distance / (2 * m)))
+            better = (score > best_score[idx]) | ((score == best_score[idx]) & (chosen < best_index[idx]))
+            best_score[idx[better]] = score[better]
+            best_index[idx[better]] = chosen[better]
+
+        with self._lock:
+            self.stats.rows += int(active.size)
+            self.stats.candidates += count * int(active.size)
+            self.stats.abandoned += abandoned
+            self.stats.full += scored
+            self.stats.pruned += count * int(active.size) - abandoned - scored
+
+        labels = self.names
+        for row, choice in zip(active, best_index):
+            names[row] = labels[choice]
+        confidence[active] = np.clip(best_score, 0.0, 1.0)
+        return names, confidence
+
+    def _prepare(
+        self, n: int, tick_rate_hz: float, frequency: float, down: int, radius: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        full = self.render(n, tick_rate_hz, frequency)
+        reduced = np.ascontiguousarray(full[:, ::down])
+        upper, lower = _keogh_envelope(reduced, radius)
+        return full, reduced, upper, lower
+
+
 class RhythmDetector:
     """Real-time rhythm detection for price ticks.
 
     This detector ingests 1-second tick data, performs FFT + autocorrelation
     rhythm analysis, classifies waveforms, and provides predictive signals.
 
+    Every ingested tick bumps ``version``. Detection results are memoized
+    per version, and ``refresh`` consults a ``DetectionPolicy`` before
+    paying for a new detection.
+
     Core API:
     - add_tick(price, timestamp=None)
     - detect_wave_pattern()
+    - refresh()
     - should_trade()
+
+    Thread safety: one writer and any number of readers may run
+    concurrently. Writers (``add_tick``, ``add_ticks``) serialize on a
+    writer lock and bracket each mutation with a sequence counter. Readers
+    never take that lock on the fast path; they copy what they need and
+    retry if the counter moved, seqlock style, so detection cost never
+    lands on the ingestion thread.
     """
 
-    def __init__(self, config: RhythmConfig | None = None) -> None:
+    def __init__(
+        self,
+        config: RhythmConfig | None = None,
+        policy: DetectionPolicy | None = None,
+        templates: TemplateLibrary | None = None,
+    ) -> None:
         self.config = config or RhythmConfig()
+        self.policy = policy or DetectionPolicy()
+        self.templates = templates or TemplateLibrary()
         self.maxlen = int(self.config.window_seconds * self.config.tick_rate_hz)
-        self._prices: Deque[float] = deque(maxlen=self.maxlen)
-        self._timestamps: Deque[float] = deque(maxlen=self.maxlen)
-        self._lock = threading.Lock()
+        self._prices = RingBuffer(self.maxlen)
+        self._timestamps = RingBuffer(self.maxlen)
+        self._write_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._seq = 0
         self._last_state: Optional[RhythmState] = None
+        self._version = 0
+        self._state_version = -1
+        self._ref = 0.0
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._sxy = 0.0
+        self._sums_age = 0
+        self._robust = RollingMedianMAD()
+        self._extrema = RollingExtrema(min(_SR_LOOKBACK, self.maxlen))
+        self._precomputed = PrecomputeCache(self.config.precompute_cache_size)
+        self._sdft: Optional[SlidingDFT] = None
+        self._band_freqs = np.empty(0)
+        self._grid_freqs = np.empty(0)
+        if self.config.incremental_spectrum:
+            self._init_sliding_dft()
 
     def add_tick(self, price: float, timestamp: Optional[float] = None) -> None:
         """Add a new price tick to the buffer.
@@ -120,70 +771,324 @@ class RhythmDetector:
             Latest price tick.
         timestamp : float, optional
             Unix timestamp in seconds.
+
+        Notes
+        -----
+        Thread-safe; concurrent writers are serialized.
         """
 
-        with self._lock:
-            if timestamp is None:
-                timestamp = self._timestamps[-1] + 1.0 / self.config.tick_rate_hz if self._timestamps else 0.0
-
-            if self._timestamps:
-                gap = timestamp - self._timestamps[-1]
-                if gap > self.config.max_gap_s:
-                    self._prices.clear()
-                    self._timestamps.clear()
-                elif self.config.fill_gaps and gap > (1.0 / self.config.tick_rate_hz):
-                    missing = int(gap * self.config.tick_rate_hz) - 1
-                    for idx in range(missing):
-                        self._timestamps.append(self._timestamps[-1] + 1.0 / self.config.tick_rate_hz)
-                        self._prices.append(self._prices[-1])
-
-            self._timestamps.append(timestamp)
-            self._prices.append(float(price))
-
-    def detect_wave_pattern(self) -> Dict[str, object]:
+        with self._write_lock:
+            self._seq += 1
+            try:
+                self._add_tick(price, timestamp)
+            finally:
+                self._seq += 1
+
+    def _add_tick(self, price: float, timestamp: Optional[float]) -> None:
+        if timestamp is None:
+            timestamp = self._timestamps[-1] + 1.0 / self.config.tick_rate_hz if self._timestamps else 0.0
+
+        if self._timestamps:
+            gap = timestamp - self._timestamps[-1]
+            if gap > self.config.max_gap_s:
+                self._clear()
+            elif self.config.fill_gaps and gap > (1.0 / self.config.tick_rate_hz):
+                missing = int(gap * self.config.tick_rate_hz) - 1
+                for idx in range(missing):
+                    self._append(self._timestamps[-1] + 1.0 / self.config.tick_rate_hz, self._prices[-1])
+
+        self._append(timestamp, float(price))
+        self._version += 1
+
+    @property
+    def version(self) -> int:
+        """Number of ticks ingested so far."""
+
+        return self._version
+
+    @property
+    def detected_version(self) -> int:
+        """``version`` at the last detection run, or -1 before the first."""
+
+        return self._state_version
+
+    def spectral_energy(self) -> float:
+        """Cheap proxy for the window's spectral energy.
+
+        Band energy from the sliding DFT when it is active, otherwise the
+        window variance, which equals the total non-DC energy per sample by
+        Parseval's theorem. Thread-safe; never blocks writers.
+        """
+
+        return self._read_consistent(self._spectral_energy)
+
+    def _spectral_energy(self) -> float:
+        if self._sdft is not None and self._sdft.ready:
+            return float(np.sum(self._sdft.band_magnitudes() ** 2))
+        count = len(self._prices)
+        if count == 0:
+            return 0.0
+        mean = self._sum / count
+        return max(0.0, self._sumsq / count - mean * mean)
+
+    def _read_consistent(self, read: Callable[[], T]) -> T:
+        """Run ``read`` against a state no writer touched meanwhile.
+
+        ``read`` must copy everything it returns. It is retried while the
+        sequence counter is odd (a write is in flight) or has moved, and
+        exceptions from torn reads are treated the same way. After
+        ``_SNAPSHOT_RETRIES`` attempts the writer lock is taken so a
+        saturated feed cannot starve readers.
+        """
+
+        for _ in range(_SNAPSHOT_RETRIES):
+            start = self._seq
+            if start % 2 == 0:
+                try:
+                    result = read()
+                except (IndexError, ValueError):
+                    pass
+                else:
+                    if self._seq == start:
+                        return result
+            time.sleep(0)
+        with self._write_lock:
+            return read()
+
+    def _append(self, timestamp: float, price: float) -> None:
+        evicted = self._prices[0] if len(self._prices) == self.maxlen else None
+        self._timestamps.append(timestamp)
+        self._prices.append(price)
+        if evicted is not None:
+            self._robust.remove(evicted)
+            self._sum -= evicted - self._ref
+            self._sumsq -= (evicted - self._ref) ** 2
+            # Every remaining sample moves one position towards the front.
+            self._sxy -= self._sum
+        elif len(self._prices) == 1:
+            self._ref = price
+        self._robust.add(price)
+        self._extrema.add(price)
+        offset = price - self._ref
+        self._sum += offset
+        self._sumsq += offset * offset
+        self._sxy += (len(self._prices) - 1) * offset
+        self._sums_age += 1
+        if self._sums_age >= self.maxlen:
+            self._rebuild_sums(self._prices.view())
+        if self._sdft is None or len(self._prices) < self.maxlen:
+            return
+        if evicted is None or not self._sdft.ready or self._sdft.needs_resync():
+            self._sdft.resync(self._prices.view())
+        else:
+            self._sdft.update(price, evicted)
+
+    def add_ticks(self, prices: np.ndarray, timestamps: Optional[np.ndarray] = None) -> None:
+        """Add a batch of ticks under a single lock acquisition.
+
+        The buffer ends up exactly as if ``add_tick`` had been called for
+        each tick in order. Batches that are small next to the window take
+        that path tick by tick, keeping the running statistics incremental.
+        Larger batches apply ``max_gap_s`` resets and ``fill_gaps`` forward
+        fills with vectorized operations, then rebuild the derived state
+        once.
+
+        Parameters
+        ----------
+        prices : np.ndarray
+            Price ticks in arrival order.
+        timestamps : np.ndarray, optional
+            Unix timestamps in seconds. When omitted, ticks are spaced
+            ``1 / tick_rate_hz`` apart after the last buffered timestamp.
+
+        Notes
+        -----
+        Thread-safe; concurrent readers see either none or all of the batch.
+        """
+
+        prices = np.asarray(prices, dtype=np.float64).ravel()
+        if prices.size == 0:
+            return
+        with self._write_lock:
+            self._seq += 1
+            try:
+                self._add_ticks(prices, timestamps)
+            finally:
+                self._seq += 1
+
+    def _add_ticks(self, prices: np.ndarray, timestamps: Optional[np.ndarray]) -> None:
+        if timestamps is not None:
+            timestamps = np.asarray(timestamps, dtype=np.float64).ravel()
+            if timestamps.size != prices.size:
+                raise ValueError("prices and timestamps must have the same length")
+        if prices.size <= max(_SMALL_BATCH_TICKS, self.maxlen // 64):
+            # Appending tick by tick keeps every running structure
+            # incremental; a rebuild only pays off for large batches.
+            stamps = [None] * prices.size if timestamps is None else timestamps.tolist()
+            for price, timestamp in zip(prices.tolist(), stamps):
+                self._add_tick(price, timestamp)
+            return
+
+        step = 1.0 / self.config.tick_rate_hz
+        has_last = len(self._timestamps) > 0
+        if timestamps is None:
+            # A sequential cumsum reproduces the repeated ``last + step``
+            # additions of add_tick bit for bit.
+            seed = self._timestamps[-1] if has_last else 0.0
+            increments = np.full(prices.size + int(has_last) - 1, step)
+            timestamps = np.cumsum(np.concatenate(([seed], increments)))[int(has_last) :]
+
+        if has_last:
+            prev_ts = np.concatenate(([self._timestamps[-1]], timestamps[:-1]))
+            prev_prices = np.concatenate(([self._prices[-1]], prices[:-1]))
+        else:
+            prev_ts = np.concatenate(([np.nan], timestamps[:-1]))
+            prev_prices = np.concatenate(([np.nan], prices[:-1]))
+        has_prev = np.ones(prices.size, dtype=bool)
+        has_prev[0] = has_last
+        gaps = timestamps - prev_ts
+
+        resets = np.flatnonzero(has_prev & (gaps > self.config.max_gap_s))
+        start = 0
+        if resets.size:
+            start = int(resets[-1])
+            has_prev[start] = False
+
+        seg_prices = prices[start:]
+        seg_ts = timestamps[start:]
+        missing = np.zeros(seg_prices.size, dtype=np.int64)
+        if self.config.fill_gaps:
+            seg_gaps = gaps[start:]
+            fill = has_prev[start:] & (seg_gaps > step)
+            missing[fill] = np.maximum((seg_gaps[fill] * self.config.tick_rate_hz).astype(np.int64) - 1, 0)
+
+        if missing.any():
+            counts = missing + 1
+            tick_pos = np.cumsum(counts) - 1
+            out_prices = np.repeat(prev_prices[start:], counts)
+            out_prices[tick_pos] = seg_prices
+            out_ts = np.empty(out_prices.size)
+            out_ts[tick_pos] = seg_ts
+
+            gapped = np.flatnonzero(missing)
+            width = int(missing[gapped].max()) + 1
+            fills = np.full((gapped.size, width), step)
+            fills[:, 0] = prev_ts[start:][gapped]
+            np.cumsum(fills, axis=1, out=fills)
+            cols = np.arange(width)
+            keep = (cols >= 1) & (cols <= missing[gapped][:, None])
+            fill_mask = np.ones(out_ts.size, dtype=bool)
+            fill_mask[tick_pos] = False
+            out_ts[fill_mask] = fills[keep]
+        else:
+            out_prices = seg_prices
+            out_ts = seg_ts
+
+        if resets.size:
+            self._clear()
+        self._prices.extend(out_prices)
+        self._timestamps.extend(out_ts)
+        self._resync_derived()
+        self._version += prices.size
+
+    def _clear(self) -> None:
+        self._prices.clear()
+        self._timestamps.clear()
+        self._robust.clear()
+        self._extrema.clear()
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._sxy = 0.0
+        self._sums_age = 0
+        if self._sdft is not None:
+            self._sdft.reset()
+
+    def _resync_derived(self) -> None:
+        """Rebuild incremental state from the buffers after a bulk write."""
+
+        window = self._prices.view()
+        self._robust.rebuild(window)
+        self._extrema.rebuild(window)
+        self._rebuild_sums(window)
+        if self._sdft is None:
+            return
+        if len(self._prices) == self.maxlen:
+            self._sdft.resync(self._prices.view())
+        else:
+            self._sdft.reset()
+
+    def _rebuild_sums(self, window: np.ndarray) -> None:
+        """Recompute the running sums exactly, discarding accumulated rounding.
+
+        Called after bulk writes and once per window length of single-tick
+        appends, which keeps the amortized cost per tick O(1).
+        """
+
+        self._ref = float(window[0]) if window.size else 0.0
+        offsets = window - self._ref
+        self._sum = float(np.sum(offsets))
+        self._sumsq = float(np.dot(offsets, offsets))
+        self._sxy = float(np.dot(np.arange(offsets.size, dtype=np.float64), offsets))
+        self._sums_age = 0
+
+    def _running_slope(self) -> float:
+        """OLS slope per tick from the running sums."""
+
+        n = len(self._prices)
+        if n < 2:
+            return 0.0
+        sum_x = n * (n - 1) / 2.0
+        sum_xx = (n - 1) * n * (2 * n - 1) / 6.0
+        return (self._sxy - sum_x * self._sum / n) / (sum_xx - sum_x * sum_x / n)
+
+    def detect_wave_pattern(self, force: bool = False) -> Dict[str, object]:
         """Detect rhythm pattern and return computed state.
 
+        The result is memoized per tick version, so repeated calls without
+        new ticks return the cached state.
+
+        Parameters
+        ----------
+        force : bool
+            Recompute even when no tick has arrived since the last run.
+
         Returns
         -------
         dict
             Rhythm state dictionary.
+
+        Notes
+        -----
+        Thread-safe. The window is read as a seqlock snapshot, so the
+        analysis runs without holding any lock the writer needs.
         """
 
-        with self._lock:
-            if len(self._prices) < max(32, int(self.config.min_period_s * self.config.tick_rate_hz)):
-                return {
-                    "pattern_type": "insufficient_data",
-                    "dominant_period_s": 0.0,
-                    "dominant_frequency_hz": 0.0,
-                    "regularity": 0.0,
-                    "phase": 0.0,
-                    "confidence": 0.0,
-                    "amplitude": 0.0,
-                    "trend_slope": 0.0,
-                    "p_value": 1.0,
-                    "harmonics": [],
-                    "predictions": {},
-                    "support": None,
-                    "resistance": None,
-                }
-
-            prices = np.asarray(self._prices, dtype=np.float64)
-
-        filtered = self._filter_outliers(prices)
-        detrended = detrend(filtered)
+        state = self._last_state
+        if not force and self._version == self._state_version and state is not None:
+            return state.as_dict()
+
+        snapshot = self._read_consistent(self._snapshot)
+        if snapshot.prices is None:
+            return self._store_state(_placeholder_state("insufficient_data"), snapshot.version)
+        prices, band = snapshot.prices, snapshot.band
+
+        filtered = self._filter_outliers(prices, snapshot.median, snapshot.mad)
+        detrended = _detrend_rows(filtered[None, :], self._precomputed)[0]
         amplitude = float(np.ptp(detrended) / 2.0)
 
-        freqs, magnitudes = self._fft_spectrum(detrended)
-        dominant_freq, harmonics = self._dominant_frequency(freqs, magnitudes)
+        spectrum = None
+        if band is not None:
+            dominant_freq, harmonics = self._sliding_dominant_frequency(prices, band)
+        else:
+            freqs, magnitudes, spectrum = self._fft_spectrum(detrended)
+            dominant_freq, harmonics = self._dominant_frequency(freqs, magnitudes)
         dominant_period = 1.0 / dominant_freq if dominant_freq > 0 else 0.0
 
-        regularity, p_value = self._autocorr_regularity(detrended, dominant_freq)
+        regularity, p_value = self._autocorr_regularity(detrended, dominant_freq, spectrum)
         phase = self._phase(detrended)
-        trend_slope = self._trend_slope(prices)
 
         pattern_type, confidence = self._classify_pattern(detrended, dominant_freq)
         predictions = self._predict(prices, dominant_freq, phase, amplitude)
-        support, resistance = self._support_resistance(prices)
 
         confidence = float(min(1.0, confidence * (regularity + 1e-6)))
         state = RhythmState(
@@ -194,231 +1099,1071 @@ class RhythmDetector:
             phase=phase,
             confidence=confidence,
             amplitude=amplitude,
-            trend_slope=trend_slope,
+            trend_slope=snapshot.trend_slope,
             p_value=p_value,
             harmonics=harmonics,
             predictions=predictions,
-            support=support,
-            resistance=resistance,
+            support=snapshot.support,
+            resistance=snapshot.resistance,
+        )
+        return self._store_state(state, snapshot.version)
+
+    def refresh(self) -> Dict[str, object]:
+        """Return the latest state, re-detecting only when the policy says so.
+
+        Thread-safe; policies are consulted without locking and may
+        occasionally schedule one redundant detection under contention.
+        """
+
+        if self.policy.due(self) or self._last_state is None:
+            return self.detect_wave_pattern()
+        return self._last_state.as_dict()
+
+    def _snapshot(self) -> _Snapshot:
+        version = self._version
+        if len(self._prices) < max(32, int(self.config.min_period_s * self.config.tick_rate_hz)):
+            return _Snapshot(version)
+        return _Snapshot(
+            version=version,
+            prices=self._prices.copy(),
+            median=self._robust.median(),
+            mad=self._robust.mad(),
+            band=self._sdft.band_magnitudes() if self._sdft is not None and self._sdft.ready else None,
+            trend_slope=self._running_slope(),
+            support=self._extrema.min(),
+            resistance=self._extrema.max(),
         )
-        self._last_state = state
+
+    def _store_state(self, state: RhythmState, version: int) -> Dict[str, object]:
+        with self._state_lock:
+            # A slower reader must not replace a result computed from newer ticks.
+            if version >= self._state_version:
+                self._last_state = state
+                self._state_version = version
+                self.policy.record(self)
         return state.as_dict()
 
     def should_trade(self) -> Dict[str, object]:
-        """Return trade decision based on the latest rhythm state."""
-
-        state = self._last_state or RhythmState(
-            pattern_type="unknown",
-            dominant_period_s=0.0,
-            dominant_frequency_hz=0.0,
-            regularity=0.0,
-            phase=0.0,
-            confidence=0.0,
-            amplitude=0.0,
-            trend_slope=0.0,
-            p_value=1.0,
-            harmonics=[],
-            predictions={},
-            support=None,
-            resistance=None,
-        )
+        """Return trade decision based on the policy-refreshed rhythm state.
 
-        should = (
-            state.confidence >= self.config.confidence_threshold
-            and state.regularity >= self.config.regularity_threshold
-            and state.amplitude >= self.config.min_amplitude
-        )
+        Thread-safe; the latest price is read through the same snapshot
+        protocol as ``detect_wave_pattern``.
+        """
 
-        direction = "HOLD"
-        if should and state.predictions:
-            current = self._prices[-1] if self._prices else 0.0
-            forward = state.predictions.get("60s") or state.predictions.get("30s")
-            if forward is not None:
-                direction = "BUY" if forward > current else "SELL"
+        self.refresh()
+        state = self._last_state or _placeholder_state("unknown")
+        return trade_decision(state, self.config, self._read_consistent(self._latest_price))
 
-        return {
-            "should_trade": should,
-            "direction": direction,
-            "confidence": state.confidence,
-            "regularity": state.regularity,
-            "pattern_type": state.pattern_type,
-            "dominant_period_s": state.dominant_period_s,
-        }
+    def save_state(self, path: str | os.PathLike) -> None:
+        """Write the buffers and the last detection result to ``path``.
+
+        The file is a fixed binary layout: an 8-byte magic, a little-endian
+        header length, a JSON header with the config hash and counters, then
+        the prices and timestamps as one ``(2, n)`` float64 block aligned to
+        64 bytes. ``load_state`` memory-maps that block directly. The file is
+        written next to ``path`` and renamed into place, so readers never
+        see a partial checkpoint.
+
+        Parameters
+        ----------
+        path : str or os.PathLike
+            Destination file.
+
+        Notes
+        -----
+        Thread-safe; the buffers are read as a seqlock snapshot.
+        """
+
+        version, prices, timestamps = self._read_consistent(
+            lambda: (self._version, self._prices.copy(), self._timestamps.copy())
+        )
+        state = self._last_state
+        header = json.dumps(
+            {
+                "config_hash": _config_hash(self.config),
+                "config": asdict(self.config),
+                "count": int(prices.size),
+                "version": version,
+                "state_version": self._state_version if state is not None else -1,
+                "state": state.as_dict() if state is not None else None,
+            },
+            default=float,
+        ).encode("utf-8")
+        offset = _align(len(_STATE_MAGIC) + 8 + len(header), 64)
+        temporary = f"{os.fspath(path)}.tmp"
+        with open(temporary, "wb") as handle:
+            handle.write(_STATE_MAGIC)
+            handle.write(struct.pack("<Q", len(header)))
+            handle.write(header)
+            handle.write(b"\0" * (offset - handle.tell()))
+            np.stack((prices, timestamps)).astype("<f8").tofile(handle)
+        os.replace(temporary, path)
+
+    def load_state(self, path: str | os.PathLike, resume_at: Optional[float] = None) -> None:
+        """Restore buffers and the last detection result written by ``save_state``.
+
+        Parameters
+        ----------
+        path : str or os.PathLike
+            Checkpoint file.
+        resume_at : float, optional
+            Timestamp of the first tick expected after the restart. The
+            restored timestamps are shifted so the downtime is not seen as a
+            gap, which would otherwise clear the window on the next tick
+            once it exceeds ``max_gap_s``.
+
+        Raises
+        ------
+        ValueError
+            If the file is not a complete checkpoint, its header does not
+            match the current ``RhythmState`` fields, or it was written with
+            a different ``RhythmConfig``.
+
+        Notes
+        -----
+        Thread-safe; takes the writer lock like ``add_ticks``.
+        """
 
-    def _filter_outliers(self, prices: np.ndarray) -> np.ndarray:
-        median = np.median(prices)
-        mad = np.median(np.abs(prices - median)) + 1e-9
-        z_scores = 0.6745 * (prices - median) / mad
-        filtered = prices.copy()
-        filtered[np.abs(z_scores) > self.config.outlier_zscore] = median
-        return filtered
-
-    def _fft_spectrum(self, data: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
-        n = len(data)
-        window = windows.hann(n)
-        padded = int(2 ** math.ceil(math.log2(n)))
-        spectrum = np.fft.rfft(data * window, n=padded)
-        magnitudes = np.abs(spectrum)
-        freqs = np.fft.rfftfreq(padded, d=1.0 / self.config.tick_rate_hz)
-        return freqs, magnitudes
+        header, block = _read_checkpoint(path)
+        try:
+            config_hash = header["config_hash"]
+            version = int(header["version"])
+            state, state_version = header["state"], -1
+            if state is not None:
+                state["harmonics"] = [tuple(pair) for pair in state["harmonics"]]
+                state, state_version = RhythmState(**state), int(header["state_version"])
+        except (KeyError, TypeError, ValueError) as error:
+            # Missing fields, or a state saved under an older RhythmState schema.
+            raise ValueError(f"{os.fspath(path)} has a malformed header") from error
+        if config_hash != _config_hash(self.config):
+            raise ValueError("checkpoint was written with a different RhythmConfig")
+        prices, timestamps = block[0][-self.maxlen :], block[1][-self.maxlen :]
+        if resume_at is not None and timestamps.size:
+            timestamps = timestamps + (resume_at - 1.0 / self.config.tick_rate_hz - timestamps[-1])
+
+        with self._write_lock:
+            self._seq += 1
+            try:
+                self._clear()
+                self._prices.extend(prices)
+                self._timestamps.extend(timestamps)
+                self._resync_derived()
+                self._version = version
+            finally:
+                self._seq += 1
+        with self._state_lock:
+            self._last_state, self._state_version = state, state_version
+
+    def window(self) -> Tuple[int, np.ndarray]:
+        """Consistent copy of the buffered prices and the version it reflects."""
+
+        return self._read_consistent(lambda: (self._version, self._prices.copy()))
+
+    def _latest_price(self) -> float:
+        return self._prices[-1] if self._prices else 0.0
+
+    def _filter_outliers(
+        self, prices: np.ndarray, median: Optional[float] = None, mad: Optional[float] = None
+    ) -> np.ndarray:
+        if median is None or mad is None:
+            return _filter_outliers_rows(prices[None, :], self.config.outlier_zscore)[0]
+        return _filter_outliers_rows(
+            prices[None, :], self.config.outlier_zscore, np.array([[median]]), np.array([[mad]])
+        )[0]
+
+    def _fft_spectrum(self, data: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        freqs, magnitudes, spectrum = _spectrum_rows(data[None, :], self.config.tick_rate_hz, self._precomputed)
+        return freqs, magnitudes[0], spectrum[0]
 
     def _dominant_frequency(self, freqs: np.ndarray, magnitudes: np.ndarray) -> Tuple[float, List[Tuple[float, float]]]:
-        mask = (freqs > 0) & (freqs <= 1.0 / self.config.min_period_s)
-        mask &= freqs >= 1.0 / self.config.max_period_s
-        if not np.any(mask):
+        dominant, harmonics = _dominant_rows(freqs, magnitudes[None, :], self.config, self._precomputed)
+        if dominant[0] <= 0:
             return 0.0, []
+        return float(dominant[0]), [(float(freq), float(mag)) for freq, mag in harmonics[0]]
+
+    def _init_sliding_dft(self) -> None:
+        freqs = np.fft.rfftfreq(self.maxlen, d=1.0 / self.config.tick_rate_hz)
+        band_bins = np.flatnonzero(_band_mask(freqs, self.config))
+        if band_bins.size == 0:
+            return
+        bins = np.arange(band_bins[0] - 1, band_bins[-1] + 2)
+        self._sdft = SlidingDFT(self.maxlen, bins, self.config.spectrum_resync_ticks)
+        self._band_freqs = freqs[band_bins]
+        self._grid_freqs = freqs
+
+    def _sliding_dominant_frequency(self, prices: np.ndarray, band: np.ndarray) -> Tuple[float, List[Tuple[float, float]]]:
+        peak_index = _peak_index_rows(band[None, :])[0]
+        dominant_freq = float(self._band_freqs[peak_index])
+
+        centers = _nearest_bins(self._grid_freqs, dominant_freq * _HARMONIC_MULTIPLES)
+        magnitudes = self._sdft.magnitudes_at(prices, centers, self._precomputed)
+        harmonics = [(float(self._grid_freqs[idx]), float(mag)) for idx, mag in zip(centers, magnitudes)]
+        return dominant_freq, harmonics
 
-        peaks, _ = find_peaks(magnitudes[mask])
-        if peaks.size == 0:
-            peak_index = np.argmax(magnitudes[mask])
+    def _autocorr_regularity(
+        self, data: np.ndarray, dominant_freq: float, spectrum: Optional[np.ndarray] = None
+    ) -> Tuple[float, float]:
+        regularity, p_value = _regularity_rows(
+            data[None, :],
+            np.array([dominant_freq]),
+            self.config,
+            None if spectrum is None else spectrum[None, :],
+        )
+        return float(regularity[0]), float(p_value[0])
+
+    def _phase(self, data: np.ndarray) -> float:
+        return float(_phase_rows(data[None, :], self._precomputed)[0])
+
+    def _classify_pattern(self, data: np.ndarray, dominant_freq: float) -> Tuple[str, float]:
+        names, confidence = self.templates.classify(
+            data[None, :], np.array([dominant_freq]), self.config, self._precomputed
+        )
+        return names[0], float(confidence[0])
+
+    def _predict(self, prices: np.ndarray, dominant_freq: float, phase: float, amplitude: float) -> Dict[str, float]:
+        return _predict_series(self.config, prices, dominant_freq, phase, amplitude)
+
+    def _ar_forecast(
+        self, prices: np.ndarray, horizon: Dict[str, float]
+    ) -> Tuple[Dict[str, float], Dict[str, float]]:
+        return _ar_forecast_series(self.config, prices, horizon)
+
+
+class TickDecimator:
+    """Aggregate a raw high-frequency feed into fixed-interval bars.
+
+    Ticks are bucketed by ``floor(timestamp / interval_s)`` with vectorized
+    segment reductions, so a batch of raw ticks costs a few NumPy calls no
+    matter its size. Completed bars go to the detector through
+    ``add_ticks``, or ``add_tick`` when a call closes a single bar, stamped
+    with their bucket start time. The newest bucket
+    stays open until a later tick, or ``flush``, closes it.
+
+    Parameters
+    ----------
+    detector : RhythmDetector
+        Receives one bar per completed bucket.
+    method : str
+        ``"last"``, ``"mean"`` or ``"vwap"``. VWAP requires volumes and
+        falls back to the mean for buckets with no volume.
+    interval_s : float, optional
+        Bar width. Defaults to ``1 / tick_rate_hz`` of the detector.
+
+    Core API:
+    - add_ticks(prices, timestamps, volumes=None)
+    - add_tick(price, timestamp, volume=None)
+    - flush()
+    """
+
+    METHODS = ("last", "mean", "vwap")
+
+    def __init__(self, detector: "RhythmDetector", method: str = "last", interval_s: Optional[float] = None) -> None:
+        if method not in self.METHODS:
+            raise ValueError(f"method must be one of {self.METHODS}")
+        self.detector = detector
+        self.method = method
+        self.interval_s = interval_s or 1.0 / detector.config.tick_rate_hz
+        self._lock = threading.Lock()
+        # Open bucket: index, last price, count, price sum, price*volume sum, volume sum.
+        self._open: Optional[List[float]] = None
+
+    def add_tick(self, price: float, timestamp: float, volume: Optional[float] = None) -> None:
+        """Scalar form of ``add_ticks`` for live feeds; updates the open bucket in place."""
+
+        if self.method == "vwap" and volume is None:
+            raise ValueError("vwap aggregation requires volumes")
+        price = float(price)
+        weight = float(volume) if self.method == "vwap" else 0.0
+        bucket = float(math.floor(float(timestamp) / self.interval_s))
+        with self._lock:
+            current = self._open
+            if current is not None and bucket < current[0]:
+                raise ValueError("timestamps must not decrease")
+            if current is not None and bucket == current[0]:
+                current[1] = price
+                current[2] += 1.0
+                current[3] += price
+                current[4] += price * weight
+                current[5] += weight
+                return
+            self._open = [bucket, price, 1.0, price, price * weight, weight]
+            if current is not None:
+                self._emit_one(current)
+
+    def add_ticks(
+        self, prices: np.ndarray, timestamps: np.ndarray, volumes: Optional[np.ndarray] = None
+    ) -> int:
+        """Bucket a batch of raw ticks and forward every completed bar.
+
+        Parameters
+        ----------
+        prices, timestamps : np.ndarray
+            Raw ticks in arrival order; timestamps must not decrease.
+        volumes : np.ndarray, optional
+            Traded volume per tick, required for ``"vwap"``.
+
+        Returns
+        -------
+        int
+            Number of bars forwarded to the detector.
+        """
+
+        prices = np.asarray(prices, dtype=np.float64).ravel()
+        timestamps = np.asarray(timestamps, dtype=np.float64).ravel()
+        if timestamps.size != prices.size:
+            raise ValueError("timestamps must have the same length as prices")
+        if self.method == "vwap":
+            if volumes is None:
+                raise ValueError("vwap aggregation requires volumes")
+            volumes = np.asarray(volumes, dtype=np.float64).ravel()
         else:
-            peak_index = peaks[np.argmax(magnitudes[mask][peaks])]
+            volumes = np.zeros(prices.size)
+        if prices.size == 0:
+            return 0
+
+        buckets = np.floor(timestamps / self.interval_s).astype(np.int64)
+        if np.any(np.diff(buckets) < 0):
+            raise ValueError("timestamps must not decrease")
+        starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+        ends = np.append(starts[1:], prices.size) - 1
+        index = buckets[starts].astype(np.float64)
+        last = prices[ends]
+        count = np.diff(np.append(starts, prices.size)).astype(np.float64)
+        total = np.add.reduceat(prices, starts)
+        weighted = np.add.reduceat(prices * volumes, starts)
+        volume = np.add.reduceat(volumes, starts)
+        segments = np.stack((index, last, count, total, weighted, volume))
 
-        masked_freqs = freqs[mask]
-        dominant_freq = float(masked_freqs[peak_index])
+        with self._lock:
+            if self._open is not None:
+                if index[0] < self._open[0]:
+                    raise ValueError("timestamps must not decrease")
+                if index[0] == self._open[0]:
+                    segments[2:, 0] += self._open[2:]
+                else:
+                    segments = np.column_stack((self._open, segments))
+            self._open = segments[:, -1].tolist()
+            return self._emit(segments[:, :-1])
+
+    def flush(self) -> int:
+        """Close the open bucket and forward it; returns the bars forwarded."""
 
-        harmonics = []
-        for multiple in (2, 3, 4):
-            target = dominant_freq * multiple
-            idx = np.argmin(np.abs(freqs - target))
-            harmonics.append((float(freqs[idx]), float(magnitudes[idx])))
-        return dominant_freq, harmonics
+        with self._lock:
+            if self._open is None:
+                return 0
+            segments = np.array(self._open)[:, None]
+            self._open = None
+            return self._emit(segments)
+
+    def _emit_one(self, bucket: List[float]) -> None:
+        index, last, count, total, weighted, volume = bucket
+        if self.method == "last":
+            bar = last
+        elif self.method == "vwap" and volume > 0:
+            bar = weighted / volume
+        else:
+            bar = total / count
+        self.detector.add_tick(bar, index * self.interval_s)
+
+    def _emit(self, segments: np.ndarray) -> int:
+        if segments.shape[1] == 0:
+            return 0
+        index, last, count, total, weighted, volume = segments
+        if self.method == "last":
+            bars = last
+        elif self.method == "mean":
+            bars = total / count
+        else:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                bars = np.where(volume > 0, weighted / volume, total / count)
+        stamps = index * self.interval_s
+        if bars.size == 1:
+            # The common live case: one bar closed by the latest tick.
+            self.detector.add_tick(float(bars[0]), float(stamps[0]))
+        else:
+            self.detector.add_ticks(bars, timestamps=stamps)
+        return int(bars.size)
 
-    def _autocorr_regularity(self, data: np.ndarray, dominant_freq: float) -> Tuple[float, float]:
-        if dominant_freq <= 0:
-            return 0.0, 1.0
 
-        max_lag = int(self.config.max_period_s * self.config.tick_rate_hz)
-        min_lag = max(1, int(self.config.min_period_s * self.config.tick_rate_hz))
+class RhythmBank:
+    """Batched rhythm detection for many symbols sharing one configuration.
 
-        normed = data - np.mean(data)
-        autocorr = np.correlate(normed, normed, mode="full")
-        autocorr = autocorr[autocorr.size // 2 :]
-        autocorr /= autocorr[0] + 1e-9
+    The symbols' windows are held as one ``(symbols, window)`` matrix. Every
+    stage of the ``RhythmDetector`` pipeline runs once along axis 1 for the
+    whole matrix: outlier filtering, detrending, the rfft, band peak picking,
+    regularity, phase, and template matching. ``RhythmDetector`` runs the
+    same row kernels on a single row, so a bank row and a detector fed the
+    same window produce the same state, except that the detector's trend
+    slope comes from running sums and agrees only to rounding.
 
-        lag_slice = autocorr[min_lag:max_lag]
-        if lag_slice.size == 0:
-            return 0.0, 1.0
-        peak = float(np.max(lag_slice))
+    Ticks are appended in lockstep, one price per symbol per tick. Gap
+    handling is left to the caller, which should forward-fill missing
+    symbols before calling ``add_ticks``.
 
-        n = len(data)
-        z = peak * math.sqrt(n)
-        p_value = float(2.0 * (1.0 - norm.cdf(abs(z))))
-        return peak, p_value
+    Core API:
+    - add_ticks(prices)
+    - detect()
+    - analyze(windows)
+    """
 
-    def _phase(self, data: np.ndarray) -> float:
-        analytic = hilbert(data)
-        phase = np.angle(analytic)
-        return float((phase[-1] + np.pi) / (2 * np.pi))
+    def __init__(
+        self, symbols: Sequence[str], config: RhythmConfig | None = None, templates: TemplateLibrary | None = None
+    ) -> None:
+        self.symbols = list(symbols)
+        self.config = config or RhythmConfig()
+        self.templates = templates or TemplateLibrary()
+        self.maxlen = int(self.config.window_seconds * self.config.tick_rate_hz)
+        self._buffer = RingBuffer(self.maxlen, width=len(self.symbols))
+        self._lock = threading.Lock()
+        self._precomputed = PrecomputeCache(self.config.precompute_cache_size)
 
-    def _trend_slope(self, prices: np.ndarray) -> float:
-        x = np.arange(len(prices))
-        slope, _ = np.polyfit(x, prices, 1)
-        return float(slope)
+    def add_ticks(self, prices: np.ndarray) -> None:
+        """Append ticks for every symbol.
 
-    def _classify_pattern(self, data: np.ndarray, dominant_freq: float) -> Tuple[str, float]:
-        if dominant_freq <= 0:
-            return "irregular", 0.0
-
-        t = np.arange(len(data)) / self.config.tick_rate_hz
-        wave_sine = np.sin(2 * np.pi * dominant_freq * t)
-        wave_saw = sawtooth(2 * np.pi * dominant_freq * t)
-        wave_tri = sawtooth(2 * np.pi * dominant_freq * t, 0.5)
-
-        templates = {
-            "sine": wave_sine,
-            "sawtooth": wave_saw,
-            "triangle": wave_tri,
-        }
+        Parameters
+        ----------
+        prices : np.ndarray
+            Shape ``(symbols,)`` for one tick, or ``(ticks, symbols)`` for a
+            block of ticks in arrival order.
+        """
 
-        scores = {}
-        for name, template in templates.items():
-            corr = np.corrcoef(data, template)[0, 1]
-            dtw_score = self._dtw_similarity(data, template)
-            scores[name] = 0.6 * corr + 0.4 * dtw_score
-
-        best = max(scores, key=scores.get)
-        confidence = max(0.0, min(1.0, scores[best]))
-        return best, confidence
-
-    def _dtw_similarity(self, series: np.ndarray, template: np.ndarray) -> float:
-        down = max(1, self.config.dtw_downsample)
-        a = series[::down]
-        b = template[::down]
-        n, m = len(a), len(b)
-
-        dtw = np.full((n + 1, m + 1), np.inf)
-        dtw[0, 0] = 0.0
-        for i in range(1, n + 1):
-            for j in range(1, m + 1):
-                cost = abs(a[i - 1] - b[j - 1])
-                dtw[i, j] = cost + min(dtw[i - 1, j], dtw[i, j - 1], dtw[i - 1, j - 1])
-        distance = dtw[n, m]
-        return float(1.0 / (1.0 + distance / (n + m)))
+        prices = np.asarray(prices, dtype=np.float64)
+        if prices.shape[-1] != len(self.symbols):
+            raise ValueError("expected one price per symbol")
+        with self._lock:
+            self._buffer.extend(prices)
 
-    def _predict(self, prices: np.ndarray, dominant_freq: float, phase: float, amplitude: float) -> Dict[str, float]:
-        if dominant_freq <= 0:
-            return {}
+    def windows(self) -> np.ndarray:
+        """Current windows as a ``(symbols, window)`` matrix."""
 
-        current = prices[-1]
-        horizon = {"30s": 30, "60s": 60, "120s": 120}
-        predictions = {}
+        with self._lock:
+            return np.ascontiguousarray(self._buffer.view().T)
 
-        sine_predictions = {}
-        for label, seconds in horizon.items():
-            radians = 2 * np.pi * dominant_freq * seconds
-            sine_predictions[label] = current + amplitude * math.sin(radians + phase * 2 * np.pi)
+    def detect(self) -> List[RhythmState]:
+        """Run detection over the buffered windows of every symbol."""
 
-        ar_predictions, ar_sigma = self._ar_forecast(prices, horizon)
+        return self.analyze(self.windows())
 
-        for label in horizon:
-            if label in ar_predictions:
-                predictions[label] = float(0.6 * sine_predictions[label] + 0.4 * ar_predictions[label])
-            else:
-                predictions[label] = float(sine_predictions[label])
-            if ar_sigma is not None:
-                predictions[f"{label}_ci"] = float(ar_sigma)
-
-        return predictions
-
-    def _ar_forecast(self, prices: np.ndarray, horizon: Dict[str, int]) -> Tuple[Dict[str, float], Optional[float]]:
-        if len(prices) < 10:
-            return {}, None
-
-        diffs = np.diff(prices)
-        order = min(3, max(1, len(diffs) // 10))
-        y = diffs[order:]
-        if y.size == 0:
-            return {}, None
-
-        X = np.column_stack([diffs[order - k - 1 : -k - 1] for k in range(order)])
-        coeffs, *_ = np.linalg.lstsq(X, y, rcond=None)
-
-        residuals = y - X @ coeffs
-        sigma = float(np.std(residuals)) if residuals.size else None
-
-        forecasts = {}
-        history = diffs.copy()
-        for label, seconds in horizon.items():
-            steps = int(seconds * self.config.tick_rate_hz)
-            forecast = 0.0
-            temp = history.tolist()
-            for _ in range(steps):
-                prev = np.array(temp[-order:][::-1])
-                next_val = float(np.dot(coeffs, prev))
-                temp.append(next_val)
-                forecast += next_val
-            forecasts[label] = float(prices[-1] + forecast)
-        return forecasts, sigma
-
-    def _support_resistance(self, prices: np.ndarray) -> Tuple[Optional[float], Optional[float]]:
-        if len(prices) < 10:
-            return None, None
-
-        series = pd.Series(prices)
-        support = float(series.rolling(20, min_periods=5).min().iloc[-1])
-        resistance = float(series.rolling(20, min_periods=5).max().iloc[-1])
-        return support, resistance
-
-
-__all__ = ["RhythmDetector", "RhythmConfig", "RhythmState"]
+    def analyze(self, windows: np.ndarray) -> List[RhythmState]:
+        """Run the detection pipeline over explicit price windows.
+
+        Parameters
+        ----------
+        windows : np.ndarray
+            Price matrix of shape ``(rows, window)``, oldest tick first.
+
+        Returns
+        -------
+        list of RhythmState
+            One state per row.
+        """
+
+        prices = np.ascontiguousarray(windows, dtype=np.float64)
+        rows, length = prices.shape
+        if length < max(32, int(self.config.min_period_s * self.config.tick_rate_hz)):
+            return [_placeholder_state("insufficient_data") for _ in range(rows)]
+
+        filtered = _filter_outliers_rows(prices, self.config.outlier_zscore)
+        cache = self._precomputed
+        detrended = _detrend_rows(filtered, cache)
+        amplitude = np.ptp(detrended, axis=1) / 2.0
+
+        freqs, magnitudes, spectrum = _spectrum_rows(detrended, self.config.tick_rate_hz, cache)
+        dominant, harmonics = _dominant_rows(freqs, magnitudes, self.config, cache)
+        regularity, p_value = _regularity_rows(detrended, dominant, self.config, spectrum, cache)
+        phase = _phase_rows(detrended, cache)
+        trend_slope = _ols_slope_rows(prices, cache)
+        patterns, confidence = self.templates.classify(detrended, dominant, self.config, cache)
+        support, resistance = _support_resistance_rows(prices)
+        confidence = np.minimum(1.0, confidence * (regularity + 1e-6))
+
+        states = []
+        for row in range(rows):
+            freq = float(dominant[row])
+            states.append(
+                RhythmState(
+                    pattern_type=patterns[row],
+                    dominant_period_s=1.0 / freq if freq > 0 else 0.0,
+                    dominant_frequency_hz=freq,
+                    regularity=float(regularity[row]),
+                    phase=float(phase[row]),
+                    confidence=float(confidence[row]),
+                    amplitude=float(amplitude[row]),
+                    trend_slope=float(trend_slope[row]),
+                    p_value=float(p_value[row]),
+                    harmonics=[(float(f), float(m)) for f, m in harmonics[row]] if freq > 0 else [],
+                    predictions=_predict_series(
+                        self.config, prices[row], freq, float(phase[row]), float(amplitude[row])
+                    ),
+                    support=float(support[row]) if length >= 10 else None,
+                    resistance=float(resistance[row]) if length >= 10 else None,
+                )
+            )
+        return states
+
+
+_HARMONIC_MULTIPLES = np.array([2.0, 3.0, 4.0])
+_SMALL_BATCH_TICKS = 8
+_SNAPSHOT_RETRIES = 8
+_SR_LOOKBACK = 20
+_STATE_MAGIC = b"RHYTHM\x00\x01"
+
+
+def _config_hash(config: RhythmConfig) -> str:
+    payload = json.dumps(asdict(config), sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _align(size: int, boundary: int) -> int:
+    return -(-size // boundary) * boundary
+
+
+def _read_checkpoint(path: str | os.PathLike) -> Tuple[Dict[str, object], np.ndarray]:
+    """Parse a ``save_state`` header and memory-map its ``(2, n)`` data block.
+
+    Raises ``ValueError`` for anything that is not a complete checkpoint,
+    including files truncated by an interrupted write.
+    """
+
+    name = os.fspath(path)
+    with open(path, "rb") as handle:
+        magic = handle.read(len(_STATE_MAGIC))
+        if magic != _STATE_MAGIC:
+            raise ValueError(f"{name} is not a rhythm detector checkpoint")
+        prefix = handle.read(8)
+        if len(prefix) != 8:
+            raise ValueError(f"{name} is truncated")
+        (length,) = struct.unpack("<Q", prefix)
+        raw = handle.read(length)
+        if len(raw) != length:
+            raise ValueError(f"{name} is truncated")
+        header = json.loads(raw.decode("utf-8"))
+        size = os.fstat(handle.fileno()).st_size
+    try:
+        count = int(header["count"])
+    except (KeyError, TypeError) as error:
+        raise ValueError(f"{name} has a malformed header") from error
+    if count == 0:
+        return header, np.empty((2, 0))
+    offset = _align(len(_STATE_MAGIC) + 8 + length, 64)
+    if count < 0 or size < offset + 2 * 8 * count:
+        raise ValueError(f"{name} is truncated")
+    return header, np.memmap(path, dtype="<f8", mode="r", offset=offset, shape=(2, count))
+
+
+def _placeholder_state(pattern_type: str) -> RhythmState:
+    return RhythmState(
+        pattern_type=pattern_type,
+        dominant_period_s=0.0,
+        dominant_frequency_hz=0.0,
+        regularity=0.0,
+        phase=0.0,
+        confidence=0.0,
+        amplitude=0.0,
+        trend_slope=0.0,
+        p_value=1.0,
+        harmonics=[],
+        predictions={},
+        support=None,
+        resistance=None,
+    )
+
+
+def trade_decision(state: RhythmState, config: RhythmConfig, current_price: float) -> Dict[str, object]:
+    """Turn a rhythm state into a trade decision.
+
+    Parameters
+    ----------
+    state : RhythmState
+        Detected rhythm state.
+    config : RhythmConfig
+        Thresholds gating the trade.
+    current_price : float
+        Latest price, compared against the forward prediction.
+
+    Returns
+    -------
+    dict
+        Decision dictionary as returned by ``RhythmDetector.should_trade``.
+    """
+
+    should = (
+        state.confidence >= config.confidence_threshold
+        and state.regularity >= config.regularity_threshold
+        and state.amplitude >= config.min_amplitude
+    )
+
+    direction = "HOLD"
+    if should and state.predictions:
+        forward = state.predictions.get("60s") or state.predictions.get("30s")
+        if forward is not None:
+            direction = "BUY" if forward > current_price else "SELL"
+
+    return {
+        "should_trade": should,
+        "direction": direction,
+        "confidence": state.confidence,
+        "regularity": state.regularity,
+        "pattern_type": state.pattern_type,
+        "dominant_period_s": state.dominant_period_s,
+    }
+
+
+# Row kernels. Each takes a (rows, window) matrix and works along axis 1 so
+# RhythmBank and RhythmDetector share one implementation of every stage.
+
+
+def _filter_outliers_rows(
+    prices: np.ndarray,
+    zscore: float,
+    median: Optional[np.ndarray] = None,
+    mad: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Replace robust z-score outliers with the row median.
+
+    ``median`` and ``mad`` are ``(rows, 1)`` statistics maintained elsewhere;
+    they are computed from the rows when omitted.
+    """
+
+    if median is None or mad is None:
+        median = np.median(prices, axis=1, keepdims=True)
+        mad = np.median(np.abs(prices - median), axis=1, keepdims=True)
+    z_scores = 0.6745 * (prices - median) / (mad + 1e-9)
+    return np.where(np.abs(z_scores) > zscore, median, prices)
+
+
+def _precomputed(cache: Optional[PrecomputeCache], key: Hashable, factory: Callable[[], T]) -> T:
+    return factory() if cache is None else cache.get(key, factory)
+
+
+def _next_fast_len(size: int) -> int:
+    """Smallest 5-smooth integer >= ``size``, a fast length for pocketfft."""
+
+    candidate = max(1, size)
+    while True:
+        remainder = candidate
+        for factor in (2, 3, 5):
+            while remainder % factor == 0:
+                remainder //= factor
+        if remainder == 1:
+            return candidate
+        candidate += 1
+
+
+def _regression_axis(n: int) -> Tuple[np.ndarray, float]:
+    x = np.arange(n) - (n - 1) / 2.0
+    return x, float(np.sum(x * x))
+
+
+def _spectrum_plan(n: int, tick_rate_hz: float) -> Tuple[int, np.ndarray, Optional[np.ndarray]]:
+    """FFT length, frequency grid and, for awkward ``n``, a Hann window."""
+
+    nfft = 2 * _next_fast_len(n)
+    freqs = np.fft.rfftfreq(nfft, d=1.0 / tick_rate_hz)
+    hann = None if nfft == 2 * n else 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(n) / n)
+    return nfft, freqs, hann
+
+
+def _ols_slope_rows(data: np.ndarray, cache: Optional[PrecomputeCache] = None) -> np.ndarray:
+    n = data.shape[1]
+    x, xx = _precomputed(cache, ("axis", n), lambda: _regression_axis(n))
+    centered = data - np.mean(data, axis=1, keepdims=True)
+    return np.sum(centered * x, axis=1) / xx
+
+
+def _detrend_rows(data: np.ndarray, cache: Optional[PrecomputeCache] = None) -> np.ndarray:
+    n = data.shape[1]
+    x, xx = _precomputed(cache, ("axis", n), lambda: _regression_axis(n))
+    centered = data - np.mean(data, axis=1, keepdims=True)
+    slope = np.sum(centered * x, axis=1, keepdims=True) / xx
+    return centered - slope * x
+
+
+def _spectrum_rows(
+    data: np.ndarray, tick_rate_hz: float, cache: Optional[PrecomputeCache] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Hann-windowed magnitude spectra plus the raw transforms they came from.
+
+    Each mean-removed row is transformed once, zero-padded to twice the
+    next fast length at or above ``n`` so the same transform also yields
+    the linear autocorrelation. When that length is ``2n`` a periodic Hann
+    window of length ``n`` shifts the spectrum by exactly two bins, so
+    windowing is a three-tap filter on the transform rather than a second
+    FFT. Other lengths window in the time domain.
+    """
+
+    n = data.shape[1]
+    nfft, freqs, hann = _precomputed(cache, ("spectrum", n, tick_rate_hz), lambda: _spectrum_plan(n, tick_rate_hz))
+    centered = data - np.mean(data, axis=1, keepdims=True)
+    spectrum = np.fft.rfft(centered, n=nfft, axis=1)
+    if hann is not None:
+        return freqs, np.abs(np.fft.rfft(centered * hann, n=nfft, axis=1)), spectrum
+    extended = np.concatenate(
+        (np.conj(spectrum[:, 2:0:-1]), spectrum, np.conj(spectrum[:, -2:-4:-1])),
+        axis=1,
+    )
+    windowed = 0.5 * spectrum - 0.25 * (extended[:, :-4] + extended[:, 4:])
+    return freqs, np.abs(windowed), spectrum
+
+
+def _band_mask(freqs: np.ndarray, config: RhythmConfig) -> np.ndarray:
+    mask = (freqs > 0) & (freqs <= 1.0 / config.min_period_s)
+    mask &= freqs >= 1.0 / config.max_period_s
+    return mask
+
+
+def _peak_index_rows(magnitudes: np.ndarray) -> np.ndarray:
+    """Index of the tallest strict local maximum per row, or the argmax."""
+
+    interior = np.zeros(magnitudes.shape, dtype=bool)
+    interior[:, 1:-1] = (magnitudes[:, 1:-1] > magnitudes[:, :-2]) & (magnitudes[:, 1:-1] > magnitudes[:, 2:])
+    peaks = np.argmax(np.where(interior, magnitudes, -np.inf), axis=1)
+    return np.where(interior.any(axis=1), peaks, np.argmax(magnitudes, axis=1))
+
+
+def _nearest_bins(freqs: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """Index of the grid frequency closest to each target, lower on ties."""
+
+    upper = np.clip(np.searchsorted(freqs, targets), 1, freqs.size - 1)
+    lower = upper - 1
+    return np.where(np.abs(freqs[lower] - targets) <= np.abs(freqs[upper] - targets), lower, upper)
+
+
+def _dominant_rows(
+    freqs: np.ndarray, magnitudes: np.ndarray, config: RhythmConfig, cache: Optional[PrecomputeCache] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Dominant in-band frequency per row and its harmonics.
+
+    Returns the dominant frequencies, zero where the band is empty, and a
+    ``(rows, 3, 2)`` array of ``(frequency, magnitude)`` pairs for the 2nd to
+    4th harmonics.
+    """
+
+    band = _precomputed(
+        cache, ("band", freqs.size, freqs[-1]), lambda: np.flatnonzero(_band_mask(freqs, config))
+    )
+    rows = magnitudes.shape[0]
+    if band.size == 0:
+        return np.zeros(rows), np.zeros((rows, 0, 2))
+
+    dominant = freqs[band][_peak_index_rows(magnitudes[:, band])]
+    bins = _nearest_bins(freqs, dominant[:, None] * _HARMONIC_MULTIPLES)
+    harmonics = np.stack((freqs[bins], np.take_along_axis(magnitudes, bins, axis=1)), axis=-1)
+    return dominant, harmonics
+
+
+def _regularity_rows(
+    data: np.ndarray,
+    dominant: np.ndarray,
+    config: RhythmConfig,
+    spectrum: Optional[np.ndarray] = None,
+    cache: Optional[PrecomputeCache] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Peak normalized autocorrelation within the rhythm lag range, per row.
+
+    The autocorrelation is the inverse transform of the power spectrum
+    (Wiener-Khinchin). ``spectrum`` is the zero-padded rfft of the
+    mean-removed rows from ``_spectrum_rows``; it is recomputed when not
+    supplied.
+    """
+
+    rows, n = data.shape
+    regularity = np.zeros(rows)
+    p_value = np.ones(rows)
+    max_lag = int(config.max_period_s * config.tick_rate_hz)
+    min_lag = max(1, int(config.min_period_s * config.tick_rate_hz))
+    active = dominant > 0
+    if not np.any(active) or min_lag >= min(max_lag, n):
+        return regularity, p_value
+
+    nfft, _, _ = _precomputed(
+        cache, ("spectrum", n, config.tick_rate_hz), lambda: _spectrum_plan(n, config.tick_rate_hz)
+    )
+    if spectrum is None:
+        spectrum = np.fft.rfft(data - np.mean(data, axis=1, keepdims=True), n=nfft, axis=1)
+    power = spectrum[active].real ** 2 + spectrum[active].imag ** 2
+    autocorr = np.fft.irfft(power, n=nfft, axis=1)[:, :n]
+    autocorr /= autocorr[:, :1] + 1e-9
+
+    peak = np.max(autocorr[:, min_lag:max_lag], axis=1)
+    regularity[active] = peak
+    p_value[active] = 2.0 * (1.0 - _norm_cdf(np.abs(peak * math.sqrt(n))))
+    return regularity, p_value
+
+
+def _phase_rows(data: np.ndarray, cache: Optional[PrecomputeCache] = None) -> np.ndarray:
+    """Instantaneous phase of the last sample, in cycles.
+
+    Only the last sample of the analytic signal is needed, so instead of a
+    full inverse transform the one-sided spectrum is summed against the
+    twiddle factors of index ``n - 1``.
+    """
+
+    n = data.shape[1]
+    spectrum = np.fft.rfft(data, axis=1)
+    kernel = _precomputed(cache, ("phase", n), lambda: _last_sample_kernel(n))
+    last = np.sum(spectrum * kernel, axis=1) / n
+    return (np.angle(last) + np.pi) / (2 * np.pi)
+
+
+def _last_sample_kernel(n: int) -> np.ndarray:
+    bins = n // 2 + 1
+    weights = np.full(bins, 2.0)
+    weights[0] = 1.0
+    if n % 2 == 0:
+        weights[-1] = 1.0
+    return weights * np.exp(-2j * np.pi * np.arange(bins) / n)
+
+
+def _sawtooth(radians: np.ndarray, width: float = 1.0) -> np.ndarray:
+    """NumPy equivalent of ``scipy.signal.sawtooth``."""
+
+    cycle = np.mod(radians, 2 * np.pi)
+    rising = cycle < width * 2 * np.pi
+    out = np.empty_like(cycle)
+    out[rising] = cycle[rising] / (np.pi * width) - 1
+    if width < 1:
+        out[~rising] = (np.pi * (width + 1) - cycle[~rising]) / (np.pi * (1 - width))
+    return out
+
+
+def _norm_cdf(x: np.ndarray) -> np.ndarray:
+    """Standard normal CDF via ``math.erfc``, avoiding ``scipy.stats``."""
+
+    x = np.asarray(x, dtype=np.float64)
+    return np.array([0.5 * math.erfc(-value / math.sqrt(2.0)) for value in x.ravel()]).reshape(x.shape)
+
+
+def _corr_rows(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a - np.mean(a, axis=1, keepdims=True)
+    b = b - np.mean(b, axis=1, keepdims=True)
+    denom = np.sqrt(np.sum(a * a, axis=1) * np.sum(b * b, axis=1))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = np.sum(a * b, axis=1) / denom
+    return np.nan_to_num(corr)
+
+
+def _keogh_envelope(templates: np.ndarray, radius: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Running max and min of each template over ``[j - radius, j + radius]``."""
+
+    m = templates.shape[-1]
+    if radius >= m - 1:
+        shape = templates.shape
+        return (
+            np.broadcast_to(templates.max(axis=-1, keepdims=True), shape).copy(),
+            np.broadcast_to(templates.min(axis=-1, keepdims=True), shape).copy(),
+        )
+    pad = [(0, 0)] * (templates.ndim - 1) + [(radius, radius)]
+    width = 2 * radius + 1
+    upper = sliding_window_view(np.pad(templates, pad, constant_values=-np.inf), width, axis=-1).max(axis=-1)
+    lower = sliding_window_view(np.pad(templates, pad, constant_values=np.inf), width, axis=-1).min(axis=-1)
+    return upper, lower
+
+
+def _dtw_lower_bound(series: np.ndarray, templates: np.ndarray, upper: np.ndarray, lower: np.ndarray) -> np.ndarray:
+    """Larger of LB_Keogh and the first/last-cell bound for absolute-difference DTW."""
+
+    keogh = np.sum(np.maximum(series - upper, 0.0) + np.maximum(lower - series, 0.0), axis=-1)
+    ends = np.abs(series[..., 0] - templates[..., 0])
+    if series.shape[-1] > 1:
+        ends = ends + np.abs(series[..., -1] - templates[..., -1])
+    return np.maximum(keogh, ends)
+
+
+def _support_resistance_rows(prices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    recent = prices[:, -_SR_LOOKBACK:]
+    return np.min(recent, axis=1), np.max(recent, axis=1)
+
+
+def _predict_series(
+    config: RhythmConfig, prices: np.ndarray, dominant_freq: float, phase: float, amplitude: float
+) -> Dict[str, float]:
+    if dominant_freq <= 0:
+        return {}
+
+    current = prices[-1]
+    horizon = {f"{seconds:g}s": seconds for seconds in config.forecast_horizons_s}
+    predictions = {}
+
+    sine_predictions = {}
+    for label, seconds in horizon.items():
+        radians = 2 * np.pi * dominant_freq * seconds
+        sine_predictions[label] = current + amplitude * math.sin(radians + phase * 2 * np.pi)
+
+    ar_predictions, ar_variances = _ar_forecast_series(config, prices, horizon)
+
+    for label in horizon:
+        if label in ar_predictions:
+            predictions[label] = float(0.6 * sine_predictions[label] + 0.4 * ar_predictions[label])
+        else:
+            predictions[label] = float(sine_predictions[label])
+        if label in ar_variances:
+            predictions[f"{label}_ci"] = float(math.sqrt(ar_variances[label]))
+
+    return predictions
+
+
+def _ar_forecast_series(
+    config: RhythmConfig, prices: np.ndarray, horizon: Dict[str, float]
+) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """AR forecast of price diffs for every horizon in one recursion.
+
+    The diff recursion runs once up to the longest horizon and each horizon
+    reads its cumulative sum. The forecast variance of the price after ``h``
+    steps is ``sigma^2 * sum_{j<h} Psi_j^2``, where ``Psi`` is the running sum
+    of the AR impulse response.
+
+    Returns
+    -------
+    tuple of dict
+        Price forecasts and forecast variances keyed by horizon label.
+    """
+
+    if len(prices) < 10:
+        return {}, {}
+
+    diffs = np.diff(prices)
+    order = min(3, max(1, len(diffs) // 10))
+    y = diffs[order:]
+    if y.size == 0:
+        return {}, {}
+
+    X = np.column_stack([diffs[order - k - 1 : -k - 1] for k in range(order)])
+    coeffs, *_ = np.linalg.lstsq(X, y, rcond=None)
+
+    residuals = y - X @ coeffs
+    sigma = float(np.std(residuals))
+
+    steps = {label: int(seconds * config.tick_rate_hz) for label, seconds in horizon.items()}
+    total = max(steps.values())
+    cumulative = np.zeros(0)
+    variance = np.zeros(0)
+    if total > 0:
+        path, psi = _ar_recursion(coeffs, diffs[-order:], total)
+        cumulative = np.cumsum(path)
+        psi = np.cumsum(psi)
+        variance = sigma**2 * np.cumsum(psi**2)
+
+    forecasts = {}
+    variances = {}
+    for label, count in steps.items():
+        if count > 0:
+            forecasts[label] = float(prices[-1] + cumulative[count - 1])
+            variances[label] = float(variance[count - 1])
+        else:
+            forecasts[label] = float(prices[-1])
+            variances[label] = 0.0
+    return forecasts, variances
+
+
+def _ar_recursion(coeffs: np.ndarray, history: np.ndarray, steps: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Zero-input forecast path and impulse response of an AR filter.
+
+    ``history`` holds the last ``len(coeffs)`` observations, oldest
+    first. A plain NumPy loop: at forecast lengths this is faster than
+    importing ``scipy.signal`` for ``lfilter``.
+    """
+
+    order = coeffs.size
+    path = np.concatenate((history, np.zeros(steps)))
+    psi = np.zeros(steps + order)
+    psi[order] = 1.0
+    for step in range(order, steps + order):
+        lagged = slice(step - 1, step - order - 1 if step > order else None, -1)
+        path[step] = coeffs @ path[lagged]
+        psi[step] += coeffs @ psi[lagged]
+    return path[order:], psi[order:]
+
+
+def dtw_distance(
+    a: np.ndarray, b: np.ndarray, band: Optional[int] = None, cutoff: float | np.ndarray | None = None
+) -> float | np.ndarray:
+    """Dynamic time warping distance with absolute-difference cost.
+
+    The accumulated cost is filled one anti-diagonal at a time. Every cell on
+    an anti-diagonal depends only on the two previous ones, so each step is a
+    single vectorized NumPy update, and only three diagonals are kept in
+    memory.
+
+    Parameters
+    ----------
+    a, b : np.ndarray
+        Series to align along the last axis. Leading axes broadcast, which
+        aligns many pairs at once.
+    band : int, optional
+        Sakoe-Chiba band half-width. Cells with ``|i - j| > band`` are never
+        visited. The band is widened to ``|len(a) - len(b)|`` so the end cell
+        stays reachable. ``None`` computes the unconstrained distance.
+    cutoff : float or np.ndarray, optional
+        Early-abandoning threshold, broadcast against the pairs. Every
+        warping path crosses one of any two consecutive anti-diagonals, so
+        once both of the latest two exceed the cutoff the pair is abandoned
+        and reported as ``inf``. The fill stops when every pair is abandoned.
+
+    Returns
+    -------
+    float or np.ndarray
+        Accumulated cost of the optimal warping path, one per broadcast pair.
+    """
+
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    n, m = a.shape[-1], b.shape[-1]
+    batch = np.broadcast_shapes(a.shape[:-1], b.shape[:-1])
+    if n == 0 or m == 0:
+        return float("inf") if not batch else np.full(batch, np.inf)
+    radius = max(n, m) if band is None else max(int(band), abs(n - m))
+
+    # Diagonal buffers are indexed by row i, so for the cell (i, k - i) the
+    # upper neighbour is prev[i - 1], the left one prev[i] and the diagonal
+    # one prev2[i - 1]. Index 0 and unvisited cells stay at infinity.
+    prev2 = np.full(batch + (n + 1,), np.inf)
+    prev = np.full(batch + (n + 1,), np.inf)
+    current = np.full(batch + (n + 1,), np.inf)
+    prev2[..., 0] = 0.0
+
+    limit = None if cutoff is None else np.broadcast_to(np.asarray(cutoff, dtype=np.float64), batch)
+    abandoned = np.zeros(batch, dtype=bool)
+    previous_min = np.zeros(batch)
+    for k in range(2, n + m + 1):
+        current.fill(np.inf)
+        i_lo = max(1, k - m, (k - radius + 1) // 2)
+        i_hi = min(n, k - 1, (k + radius) // 2)
+        if i_lo <= i_hi:
+            cost = np.abs(a[..., i_lo - 1 : i_hi] - b[..., k - i_hi - 1 : k - i_lo][..., ::-1])
+            best = np.minimum(
+                np.minimum(prev[..., i_lo - 1 : i_hi], prev[..., i_lo : i_hi + 1]),
+                prev2[..., i_lo - 1 : i_hi],
+            )
+            current[..., i_lo : i_hi + 1] = cost + best
+        if limit is not None:
+            current_min = current[..., i_lo : i_hi + 1].min(axis=-1) if i_lo <= i_hi else np.full(batch, np.inf)
+            abandoned |= np.minimum(current_min, previous_min) > limit
+            if abandoned.all():
+                return float("inf") if not batch else np.full(batch, np.inf)
+            previous_min = current_min
+        prev2, prev, current = prev, current, prev2
+
+    distance = np.where(abandoned, np.inf, prev[..., n])
+    return float(distance) if distance.ndim == 0 else distance
+
+
+__all__ = [
+    "DetectionPolicy",
+    "EveryNTicks",
+    "SpectralChange",
+    "TimeBudget",
+    "RhythmDetector",
+    "RhythmConfig",
+    "RhythmState",
+    "RhythmBank",
+    "PrecomputeCache",
+    "RollingExtrema",
+    "RollingMedianMAD",
+    "SlidingDFT",
+    "TemplateLibrary",
+    "TickDecimator",
+    "TemplateStats",
+    "dtw_distance",
+    "trade_decision",
+]
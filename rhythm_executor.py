@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+import os
+import threading
+
+import numpy as np
+
+from rhythm_detector_v2 import RhythmBank, RhythmConfig, RhythmState
+
+
+_WORKER_BANK: Optional[RhythmBank] = None
+
+
+def _init_worker(config: RhythmConfig) -> None:
+    global _WORKER_BANK
+    _WORKER_BANK = RhythmBank([], config)
+
+
+def _analyze_shared(name: str, shape: Tuple[int, int], start: int, stop: int) -> List[RhythmState]:
+    """Worker entry point: analyze rows ``start:stop`` of a shared block."""
+
+    block = shared_memory.SharedMemory(name=name)
+    windows = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+    try:
+        return _WORKER_BANK.analyze(windows[start:stop])
+    finally:
+        # The view must be gone before the mapping can be closed.
+        del windows
+        block.close()
+
+
+class RhythmExecutor:
+    """Process-pool front end for batched rhythm detection.
+
+    Price windows are copied once into a ``multiprocessing.shared_memory``
+    block and workers map that block directly, so only the block name and
+    row range cross the process boundary. Each worker keeps a
+    ``RhythmBank`` and analyzes its rows with the same row kernels as
+    ``RhythmDetector``; results come back as ``RhythmState`` objects in row
+    order.
+
+    Parameters
+    ----------
+    config : RhythmConfig, optional
+        Detection configuration shared by every worker.
+    max_workers : int, optional
+        Pool size. Defaults to ``os.cpu_count()``.
+    min_rows_per_task : int
+        Rows below which a batch is not split further across workers.
+
+    Core API:
+    - submit(windows)
+    - analyze(windows)
+    - shutdown()
+    """
+
+    def __init__(
+        self,
+        config: RhythmConfig | None = None,
+        max_workers: Optional[int] = None,
+        min_rows_per_task: int = 8,
+    ) -> None:
+        self.config = config or RhythmConfig()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.min_rows_per_task = max(1, min_rows_per_task)
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers, initializer=_init_worker, initargs=(self.config,)
+        )
+
+    def submit(self, windows: np.ndarray) -> Future:
+        """Schedule detection over ``windows`` without blocking.
+
+        Parameters
+        ----------
+        windows : np.ndarray
+            Price matrix of shape ``(rows, window)`` or a single window of
+            shape ``(window,)``, oldest tick first.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves to a list of ``RhythmState``, one per row.
+        """
+
+        windows = np.atleast_2d(np.asarray(windows, dtype=np.float64))
+        rows = windows.shape[0]
+        result: Future = Future()
+        if rows == 0 or windows.size == 0:
+            result.set_result([])
+            return result
+
+        block = shared_memory.SharedMemory(create=True, size=windows.nbytes)
+        np.ndarray(windows.shape, dtype=np.float64, buffer=block.buf)[:] = windows
+
+        tasks = min(self.max_workers, max(1, rows // self.min_rows_per_task))
+        bounds = np.linspace(0, rows, tasks + 1).astype(int)
+        parts: List[Optional[List[RhythmState]]] = [None] * tasks
+        pending = [tasks]
+        lock = threading.Lock()
+
+        def collect(index: int, future: Future) -> None:
+            error = future.exception()
+            if error is None:
+                parts[index] = future.result()
+            with lock:
+                pending[0] -= 1
+                done = pending[0] == 0
+            if error is not None and not result.done():
+                result.set_exception(error)
+            if done:
+                block.close()
+                block.unlink()
+                if not result.done():
+                    result.set_result([state for part in parts for state in part])
+
+        for index in range(tasks):
+            future = self._pool.submit(
+                _analyze_shared, block.name, windows.shape, int(bounds[index]), int(bounds[index + 1])
+            )
+            future.add_done_callback(lambda f, index=index: collect(index, f))
+        return result
+
+    def analyze(self, windows: np.ndarray) -> List[RhythmState]:
+        """Blocking form of ``submit``."""
+
+        return self.submit(windows).result()
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+    def __enter__(self) -> "RhythmExecutor":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.shutdown()
+
+
+__all__ = ["RhythmExecutor"]
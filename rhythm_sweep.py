@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, replace
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence
+import argparse
+import itertools
+import json
+import math
+import random
+
+import numpy as np
+
+from rhythm_backtest import walk_forward_backtest
+from rhythm_detector_v2 import RhythmConfig
+
+
+_WORKER_PRICES: Optional[np.ndarray] = None
+
+
+def grid(**params: Sequence[object]) -> List[Dict[str, object]]:
+    """Every combination of the given ``RhythmConfig`` field values."""
+
+    names = list(params)
+    return [dict(zip(names, values)) for values in itertools.product(*(params[name] for name in names))]
+
+
+def random_search(space: Mapping[str, object], trials: int, seed: int = 0) -> List[Dict[str, object]]:
+    """Sample ``trials`` parameter sets from ``space``.
+
+    A list value is sampled uniformly from its items. A ``(low, high)``
+    tuple is sampled uniformly from the range, as an integer when both
+    bounds are integers. Duplicate draws are dropped.
+    """
+
+    rng = random.Random(seed)
+    seen = set()
+    out: List[Dict[str, object]] = []
+    for _ in range(trials):
+        params: Dict[str, object] = {}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                integral = isinstance(low, int) and isinstance(high, int)
+                params[name] = rng.randint(low, high) if integral else rng.uniform(low, high)
+            else:
+                params[name] = rng.choice(list(values))
+        key = trial_key(params)
+        if key not in seen:
+            seen.add(key)
+            out.append(params)
+    return out
+
+
+def trial_key(params: Mapping[str, object]) -> str:
+    """Canonical identifier of a parameter set, stable across runs."""
+
+    return json.dumps(params, sort_keys=True)
+
+
+def save_prices(path: str | Path, prices: np.ndarray) -> Path:
+    """Write a price history as a ``.npy`` file workers can memory-map."""
+
+    path = Path(path)
+    np.save(path, np.ascontiguousarray(prices, dtype=np.float64))
+    return path
+
+
+def run_sweep(
+    prices_path: str | Path,
+    trials: Iterable[Mapping[str, object]],
+    results_path: str | Path,
+    base_config: RhythmConfig | None = None,
+    max_workers: Optional[int] = None,
+    metric: str = "sharpe",
+    **backtest_kwargs: object,
+) -> List[Dict[str, object]]:
+    """Backtest every parameter set on a process pool and rank the results.
+
+    Each worker memory-maps the ``.npy`` price history read-only once, so
+    the series is never pickled. Every finished trial is appended to
+    ``results_path`` as one JSON line and flushed right away. Trials that
+    are already recorded there are skipped, so rerunning an interrupted
+    sweep with the same arguments only runs the remainder.
+
+    Parameters
+    ----------
+    prices_path : str or Path
+        ``.npy`` price history, as written by ``save_prices``.
+    trials : iterable of dict
+        ``RhythmConfig`` field overrides, one per trial.
+    results_path : str or Path
+        JSONL file to append results to.
+    base_config : RhythmConfig, optional
+        Configuration the overrides apply to.
+    max_workers : int, optional
+        Pool size; defaults to the CPU count.
+    metric : str
+        ``BacktestResult`` field to rank by, highest first.
+    **backtest_kwargs
+        Passed to ``walk_forward_backtest``.
+
+    Returns
+    -------
+    list of dict
+        All recorded results, including earlier runs, ranked by ``metric``.
+    """
+
+    base_config = base_config or RhythmConfig()
+    results_path = Path(results_path)
+    done = {record["trial"] for record in load_results(results_path)}
+    pending = [dict(params) for params in trials if trial_key(params) not in done]
+
+    if pending:
+        with ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_init_worker, initargs=(str(prices_path),)
+        ) as pool, results_path.open("a") as out:
+            if out.tell() and not results_path.read_bytes().endswith(b"\n"):
+                # Terminate a line cut short by an interrupted run.
+                out.write("\n")
+            futures = [pool.submit(_run_trial, base_config, params, backtest_kwargs) for params in pending]
+            for future in as_completed(futures):
+                out.write(json.dumps(future.result()) + "\n")
+                out.flush()
+
+    return rank_results(results_path, metric)
+
+
+def load_results(path: str | Path) -> List[Dict[str, object]]:
+    """Read a sweep's JSONL results, ignoring a truncated final line."""
+
+    path = Path(path)
+    if not path.exists():
+        return []
+    records = []
+    for line in path.read_text().splitlines():
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return records
+
+
+def rank_results(path: str | Path, metric: str = "sharpe") -> List[Dict[str, object]]:
+    """Recorded results sorted by ``metric`` descending, NaNs last."""
+
+    def score(record: Dict[str, object]) -> float:
+        value = record.get(metric)
+        return -math.inf if value is None or math.isnan(value) else value
+
+    return sorted(load_results(path), key=score, reverse=True)
+
+
+def _init_worker(prices_path: str) -> None:
+    global _WORKER_PRICES
+    _WORKER_PRICES = np.load(prices_path, mmap_mode="r")
+
+
+def _run_trial(
+    base_config: RhythmConfig, params: Dict[str, object], backtest_kwargs: Dict[str, object]
+) -> Dict[str, object]:
+    config = replace(base_config, **params)
+    result = walk_forward_backtest(_WORKER_PRICES, config, **backtest_kwargs)
+    return {
+        "trial": trial_key(params),
+        "params": params,
+        "config": asdict(config),
+        "win_rate": result.win_rate,
+        "sharpe": result.sharpe,
+        "max_drawdown": result.max_drawdown,
+        "trades": result.trades,
+    }
+
+
+def _parse_values(text: str) -> List[object]:
+    return [json.loads(item) for item in text.split(",")]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Sweep RhythmConfig parameters over a price history.")
+    parser.add_argument("prices", help=".npy price history")
+    parser.add_argument("results", help="JSONL file for streamed, resumable results")
+    parser.add_argument("--param", action="append", default=[], help="name=v1,v2,... (repeatable)")
+    parser.add_argument("--random", type=int, default=0, help="sample this many trials instead of the full grid")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--metric", default="sharpe")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    space = {}
+    for item in args.param:
+        name, _, values = item.partition("=")
+        space[name] = _parse_values(values)
+    trials = random_search(space, args.random, args.seed) if args.random else grid(**space)
+    ranked = run_sweep(args.prices, trials, args.results, max_workers=args.workers, metric=args.metric)
+    for record in ranked[: args.top]:
+        print(f"{record[args.metric]:>10.4f}  trades={record['trades']:<5d} {record['params']}")
+
+
+__all__ = ["grid", "load_results", "random_search", "rank_results", "run_sweep", "save_prices", "trial_key"]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+import numpy as np
+
+
+class RingBuffer:
+    """Fixed-capacity float64 circular buffer backed by one NumPy array.
+
+    Appends overwrite the oldest sample once the buffer is full. ``view``
+    returns the samples in insertion order without copying while they are
+    contiguous in storage, and with a single ``np.concatenate`` once the
+    write position has wrapped.
+
+    Parameters
+    ----------
+    capacity : int
+        Maximum number of samples retained.
+    width : int, optional
+        When given, each sample is a row of ``width`` values and views have
+        shape ``(len, width)``.
+    """
+
+    def __init__(self, capacity: int, width: Optional[int] = None) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        shape = (capacity,) if width is None else (capacity, width)
+        self._data = np.zeros(shape, dtype=np.float64)
+        self._start = 0
+        self._size = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._data.shape[0]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: int) -> float | np.ndarray:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("ring buffer index out of range")
+        item = self._data[(self._start + index) % self.capacity]
+        return float(item) if item.ndim == 0 else item.copy()
+
+    def append(self, value: float) -> None:
+        """Append one sample, evicting the oldest when full."""
+
+        end = (self._start + self._size) % self.capacity
+        self._data[end] = value
+        if self._size < self.capacity:
+            self._size += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+
+    def extend(self, values: Iterable[float] | np.ndarray) -> None:
+        """Append many samples with at most two slice assignments."""
+
+        values = np.asarray(values, dtype=np.float64).reshape((-1,) + self._data.shape[1:])
+        count = values.shape[0]
+        if count >= self.capacity:
+            self._data[:] = values[-self.capacity :]
+            self._start = 0
+            self._size = self.capacity
+            return
+
+        end = (self._start + self._size) % self.capacity
+        head = min(count, self.capacity - end)
+        self._data[end : end + head] = values[:head]
+        self._data[: count - head] = values[head:]
+        overflow = max(0, self._size + count - self.capacity)
+        self._start = (self._start + overflow) % self.capacity
+        self._size = min(self.capacity, self._size + count)
+
+    def clear(self) -> None:
+        self._start = 0
+        self._size = 0
+
+    def view(self) -> np.ndarray:
+        """Samples in insertion order, read-only when backed by storage."""
+
+        end = self._start + self._size
+        if end <= self.capacity:
+            ordered = self._data[self._start : end]
+        else:
+            ordered = np.concatenate((self._data[self._start :], self._data[: end - self.capacity]))
+        ordered.flags.writeable = False
+        return ordered
+
+    def copy(self) -> np.ndarray:
+        """Samples in insertion order as a new, writable array."""
+
+        end = self._start + self._size
+        if end <= self.capacity:
+            return self._data[self._start : end].copy()
+        return np.concatenate((self._data[self._start :], self._data[: end - self.capacity]))
+
+
+__all__ = ["RingBuffer"]
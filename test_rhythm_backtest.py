@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from rhythm_backtest import walk_forward_backtest
+from rhythm_detector_v2 import RhythmConfig, RhythmDetector
+
+
+def _loop_decisions(prices, config, step=10, warmup=100):
+    detector = RhythmDetector(config)
+    decisions = {}
+    for idx, price in enumerate(prices):
+        detector.add_tick(float(price), timestamp=float(idx))
+        if idx % step == 0 and idx > warmup:
+            detector.detect_wave_pattern()
+            decisions[idx] = detector.should_trade()
+    return decisions
+
+
+def test_walk_forward_matches_tick_by_tick_decisions():
+    rng = np.random.default_rng(47)
+    t = np.arange(900)
+    prices = 100 + np.sin(2 * np.pi * t / 40) + rng.normal(scale=0.05, size=t.size)
+    config = RhythmConfig(window_seconds=240, confidence_threshold=0.3, regularity_threshold=0.3)
+
+    result = walk_forward_backtest(prices, config, horizon=30, batch_size=16)
+    decisions = _loop_decisions(prices, config)
+
+    expected = [
+        idx for idx, decision in decisions.items() if decision["should_trade"] and idx + 30 < prices.size
+    ]
+    assert result.trades == len(expected) > 0
+    assert result.eval_index.tolist() == expected
+    assert result.direction.tolist() == [decisions[idx]["direction"] for idx in expected]
+
+
+def test_walk_forward_metrics_follow_trade_returns():
+    t = np.arange(1500)
+    prices = 100 + np.sin(2 * np.pi * t / 60)
+    config = RhythmConfig(window_seconds=300, confidence_threshold=0.0, regularity_threshold=0.0)
+
+    result = walk_forward_backtest(prices, config, horizon=15)
+    equity = np.cumprod(1 + result.returns)
+    peak = np.maximum.accumulate(np.maximum(equity, 1.0))
+    assert result.trades == result.returns.size > 0
+    assert result.win_rate == np.mean(result.returns > 0)
+    assert result.max_drawdown == pytest.approx(np.max((peak - equity) / peak))
+    assert result.sharpe == pytest.approx(result.returns.mean() / result.returns.std(ddof=1) * np.sqrt(252))
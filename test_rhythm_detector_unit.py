@@ -1,6 +1,23 @@
+import subprocess
+import sys
+import threading
+
+import pytest
 import numpy as np
 
-from rhythm_detector_v2 import RhythmDetector, RhythmConfig
+from rhythm_detector_v2 import (
+    EveryNTicks,
+    RhythmBank,
+    RhythmConfig,
+    PrecomputeCache,
+    RhythmDetector,
+    RollingExtrema,
+    RollingMedianMAD,
+    SpectralChange,
+    TemplateLibrary,
+    TickDecimator,
+    dtw_distance,
+)
 
 
 def test_detects_sine_pattern():
@@ -35,3 +52,478 @@ def test_outlier_filtering_stability():
         detector.add_tick(float(price), timestamp=float(idx))
     state = detector.detect_wave_pattern()
     assert state["pattern_type"] != "insufficient_data"
+
+
+def _reference_dtw(a, b):
+    n, m = len(a), len(b)
+    dtw = np.full((n + 1, m + 1), np.inf)
+    dtw[0, 0] = 0.0
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            cost = abs(a[i - 1] - b[j - 1])
+            dtw[i, j] = cost + min(dtw[i - 1, j], dtw[i, j - 1], dtw[i - 1, j - 1])
+    return dtw[n, m]
+
+
+def test_dtw_distance_matches_reference():
+    rng = np.random.default_rng(7)
+    for n, m in [(1, 1), (12, 12), (40, 25), (25, 40)]:
+        a = rng.normal(size=n)
+        b = rng.normal(size=m)
+        assert dtw_distance(a, b) == _reference_dtw(a, b)
+
+
+def test_dtw_band_is_upper_bound_of_unconstrained():
+    rng = np.random.default_rng(11)
+    a = rng.normal(size=60)
+    b = rng.normal(size=60)
+    full = dtw_distance(a, b)
+    assert dtw_distance(a, b, band=0) == pytest.approx(float(np.sum(np.abs(a - b))))
+    assert dtw_distance(a, b, band=5) >= full
+    assert dtw_distance(a, b, band=60) == full
+
+
+def test_incremental_spectrum_tracks_full_fft():
+    config = RhythmConfig(window_seconds=300, tick_rate_hz=1.0, incremental_spectrum=True, spectrum_resync_ticks=10_000)
+    detector = RhythmDetector(config)
+    rng = np.random.default_rng(3)
+    t = np.arange(3000)
+    prices = 100 + np.sin(2 * np.pi * t / 30) + 0.001 * t + rng.normal(scale=0.1, size=t.size)
+    for idx, price in enumerate(prices):
+        detector.add_tick(float(price), timestamp=float(idx))
+
+    window = prices[-300:]
+    n = np.arange(window.size)
+    fit = np.polyval(np.polyfit(n, window, 1), n)
+    hann = 0.5 - 0.5 * np.cos(2 * np.pi * n / window.size)
+    expected = np.abs(np.fft.fft((window - fit) * hann))[detector._sdft.bins[1:-1]]
+    np.testing.assert_allclose(detector._sdft.band_magnitudes(), expected, atol=1e-6)
+
+    state = detector.detect_wave_pattern()
+    assert state["dominant_period_s"] == pytest.approx(30.0)
+
+    centers = np.array([20, 30, 40])
+    expected = np.abs(np.fft.fft((window - fit) * hann))[centers]
+    np.testing.assert_allclose(detector._sdft.magnitudes_at(window, centers), expected, atol=1e-6)
+
+    detector.add_tick(float(prices[-1]), timestamp=3000.0)
+    misses = detector._precomputed.misses
+    detector.detect_wave_pattern()
+    assert detector._precomputed.misses == misses
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+def test_small_add_ticks_batches_match_add_tick(incremental):
+    config = RhythmConfig(window_seconds=120, tick_rate_hz=1.0, max_gap_s=5.0, incremental_spectrum=incremental)
+    looped = RhythmDetector(config)
+    batched = RhythmDetector(config)
+    rng = np.random.default_rng(8)
+    timestamps = np.cumsum(rng.choice([1.0, 1.0, 3.0, 9.0], size=400))
+    prices = 100 + np.sin(timestamps / 6.0) + rng.normal(scale=0.1, size=400)
+    for price, timestamp in zip(prices, timestamps):
+        looped.add_tick(float(price), timestamp=float(timestamp))
+    start = 0
+    while start < prices.size:
+        stop = start + int(rng.integers(1, 9))
+        batched.add_ticks(prices[start:stop], timestamps[start:stop])
+        start = stop
+    looped.add_tick(101.0)
+    batched.add_ticks([101.0])
+
+    np.testing.assert_array_equal(batched._prices.view(), looped._prices.view())
+    np.testing.assert_array_equal(batched._timestamps.view(), looped._timestamps.view())
+    assert batched.version == looped.version
+    assert (batched._sum, batched._sumsq, batched._sxy) == (looped._sum, looped._sumsq, looped._sxy)
+    assert batched.spectral_energy() == looped.spectral_energy()
+    assert batched.detect_wave_pattern() == looped.detect_wave_pattern()
+
+
+def test_add_ticks_matches_add_tick_loop():
+    config = RhythmConfig(window_seconds=60, tick_rate_hz=1.0, max_gap_s=5.0)
+    looped = RhythmDetector(config)
+    bulk = RhythmDetector(config)
+    rng = np.random.default_rng(5)
+    steps = rng.choice([0.5, 1.0, 2.5, 4.0, 7.0], size=300)
+    timestamps = np.cumsum(steps)
+    prices = rng.normal(size=300)
+    for price, timestamp in zip(prices, timestamps):
+        looped.add_tick(float(price), timestamp=float(timestamp))
+    for chunk in np.array_split(np.arange(300), 4):
+        bulk.add_ticks(prices[chunk], timestamps[chunk])
+    np.testing.assert_array_equal(bulk._prices.view(), looped._prices.view())
+    np.testing.assert_array_equal(bulk._timestamps.view(), looped._timestamps.view())
+
+
+def test_fft_autocorrelation_matches_direct_correlation():
+    detector = RhythmDetector(RhythmConfig(window_seconds=300, tick_rate_hz=1.0))
+    rng = np.random.default_rng(9)
+    data = np.sin(2 * np.pi * np.arange(300) / 25) + rng.normal(scale=0.5, size=300)
+    data -= data.mean()
+    _, _, spectrum = detector._fft_spectrum(data)
+
+    direct = np.correlate(data, data, mode="full")[data.size - 1 :]
+    direct /= direct[0] + 1e-9
+    expected = float(np.max(direct[8:240]))
+
+    regularity, _ = detector._autocorr_regularity(data, 1 / 25, spectrum)
+    assert regularity == pytest.approx(expected, abs=1e-12)
+    assert detector._autocorr_regularity(data, 1 / 25)[0] == pytest.approx(regularity, abs=1e-12)
+
+
+def test_ar_forecast_matches_stepwise_recursion():
+    detector = RhythmDetector(RhythmConfig(window_seconds=300, tick_rate_hz=1.0))
+    rng = np.random.default_rng(13)
+    prices = 100 + np.cumsum(rng.normal(size=300)) + np.sin(np.arange(300) / 5)
+    horizon = {"1s": 1, "30s": 30, "600s": 600}
+    forecasts, variances = detector._ar_forecast(prices, horizon)
+
+    diffs = np.diff(prices)
+    X = np.column_stack([diffs[3 - k - 1 : -k - 1] for k in range(3)])
+    coeffs, *_ = np.linalg.lstsq(X, diffs[3:], rcond=None)
+    history = list(diffs)
+    total = 0.0
+    for step in range(1, 601):
+        history.append(float(np.dot(coeffs, history[-3:][::-1])))
+        total += history[-1]
+        if step in (1, 30, 600):
+            assert forecasts[f"{step}s"] == pytest.approx(prices[-1] + total, abs=1e-9)
+
+    sigma = np.std(diffs[3:] - X @ coeffs)
+    assert variances["1s"] == pytest.approx(sigma**2)
+    assert variances["1s"] < variances["30s"] < variances["600s"]
+
+
+def test_rhythm_bank_matches_individual_detectors():
+    config = RhythmConfig(window_seconds=240, tick_rate_hz=1.0)
+    rng = np.random.default_rng(17)
+    periods = np.array([[20.0], [30.0], [60.0]])
+    t = np.arange(300)
+    ticks = 100 + np.sin(2 * np.pi * t / periods) + rng.normal(scale=0.2, size=(3, 300))
+
+    bank = RhythmBank(["A", "B", "C"], config)
+    bank.add_ticks(ticks.T)
+    assert bank.windows().shape == (3, 240)
+    states = bank.detect()
+
+    for row, state in enumerate(states):
+        detector = RhythmDetector(config)
+        detector.add_ticks(ticks[row])
+        detected = detector.detect_wave_pattern()
+        expected = state.as_dict()
+        # The detector keeps running OLS sums, so the slope agrees to rounding.
+        assert detected.pop("trend_slope") == pytest.approx(expected.pop("trend_slope"), rel=1e-9)
+        assert detected == expected
+    assert [round(state.dominant_period_s) for state in states] == [20, 30, 60]
+
+
+def test_batched_dtw_matches_pairwise():
+    rng = np.random.default_rng(19)
+    a = rng.normal(size=(4, 30))
+    b = rng.normal(size=(4, 30))
+    batched = dtw_distance(a, b, band=6)
+    assert batched.shape == (4,)
+    for row in range(4):
+        assert batched[row] == dtw_distance(a[row], b[row], band=6)
+
+
+def test_rolling_median_mad_matches_numpy():
+    rng = np.random.default_rng(23)
+    rolling = RollingMedianMAD()
+    window = []
+    for value in np.round(rng.normal(size=400), 1):
+        if len(window) == 25:
+            rolling.remove(window.pop(0))
+        window.append(float(value))
+        rolling.add(float(value))
+        data = np.array(window)
+        median = np.median(data)
+        assert rolling.median() == median
+        assert rolling.mad() == np.median(np.abs(data - median))
+
+
+def test_detector_tracks_robust_stats_through_resets():
+    config = RhythmConfig(window_seconds=50, tick_rate_hz=1.0, max_gap_s=5.0)
+    detector = RhythmDetector(config)
+    rng = np.random.default_rng(29)
+    timestamps = np.cumsum(rng.choice([1.0, 3.0, 9.0], size=200, p=[0.8, 0.15, 0.05]))
+    for price, timestamp in zip(rng.normal(size=200), timestamps):
+        detector.add_tick(float(price), timestamp=float(timestamp))
+    window = detector._prices.view()
+    assert detector._robust.median() == np.median(window)
+    assert len(detector._robust) == len(window)
+
+
+def test_detection_is_memoized_until_new_ticks():
+    detector = RhythmDetector(RhythmConfig(window_seconds=120))
+    for i in range(120):
+        detector.add_tick(100 + np.sin(2 * np.pi * i / 30), timestamp=i)
+    first = detector.detect_wave_pattern()
+    assert detector.detected_version == detector.version == 120
+    cached = detector._last_state
+    assert detector.detect_wave_pattern() == first
+    assert detector._last_state is cached
+    detector.add_tick(100.0, timestamp=120)
+    detector.detect_wave_pattern()
+    assert detector._last_state is not cached
+
+
+def test_every_n_ticks_policy_skips_intermediate_detections():
+    detector = RhythmDetector(RhythmConfig(window_seconds=120), policy=EveryNTicks(10))
+    runs = []
+    for i in range(100):
+        detector.add_tick(100 + np.sin(2 * np.pi * i / 30), timestamp=i)
+        detector.refresh()
+        runs.append(detector.detected_version)
+    assert sorted(set(runs)) == [1] + list(range(11, 101, 10))
+
+
+def test_spectral_change_policy_reacts_to_amplitude_jump():
+    detector = RhythmDetector(RhythmConfig(window_seconds=120), policy=SpectralChange(0.5))
+    for i in range(120):
+        detector.add_tick(100 + np.sin(2 * np.pi * i / 30), timestamp=i)
+    detector.refresh()
+    settled = detector.detected_version
+    detector.add_tick(100 + np.sin(2 * np.pi * 120 / 30), timestamp=120)
+    detector.refresh()
+    assert detector.detected_version == settled
+    for i in range(121, 160):
+        detector.add_tick(100 + 5 * np.sin(2 * np.pi * i / 30), timestamp=i)
+    detector.refresh()
+    assert detector.detected_version == detector.version
+
+
+def test_detection_does_not_take_the_writer_lock():
+    detector = RhythmDetector(RhythmConfig(window_seconds=120))
+    detector.add_ticks(100 + np.sin(2 * np.pi * np.arange(150) / 30))
+    with detector._write_lock:
+        state = detector.detect_wave_pattern()
+    assert state["pattern_type"] != "insufficient_data"
+
+
+def test_snapshots_stay_consistent_under_concurrent_writes():
+    detector = RhythmDetector(RhythmConfig(window_seconds=64))
+    stop = threading.Event()
+
+    def feed():
+        tick = 0
+        while not stop.is_set():
+            detector.add_tick(float(tick), timestamp=float(tick))
+            tick += 1
+
+    writer = threading.Thread(target=feed)
+    writer.start()
+    try:
+        for _ in range(300):
+            snapshot = detector._read_consistent(detector._snapshot)
+            prices = snapshot.prices
+            if prices is None:
+                continue
+            assert np.all(np.diff(prices) == 1.0)
+            assert snapshot.median == np.median(prices)
+            assert snapshot.mad == np.median(np.abs(prices - snapshot.median))
+            assert snapshot.resistance == prices[-1]
+    finally:
+        stop.set()
+        writer.join()
+
+
+def test_running_slope_and_extrema_track_the_window():
+    detector = RhythmDetector(RhythmConfig(window_seconds=50))
+    rng = np.random.default_rng(23)
+    prices = np.cumsum(rng.normal(size=400)) + 1000.0
+    for idx, price in enumerate(prices):
+        detector.add_tick(price, timestamp=idx)
+        window = prices[max(0, idx - 49) : idx + 1]
+        if window.size >= 2:
+            slope = np.polyfit(np.arange(window.size), window, 1)[0]
+            assert detector._running_slope() == pytest.approx(slope, rel=1e-8, abs=1e-10)
+        assert detector._extrema.min() == window[-20:].min()
+        assert detector._extrema.max() == window[-20:].max()
+
+
+def test_rolling_extrema_rebuild_matches_streaming():
+    values = np.random.default_rng(29).normal(size=60)
+    streamed = RollingExtrema(7)
+    for value in values:
+        streamed.add(value)
+    rebuilt = RollingExtrema(7)
+    rebuilt.rebuild(values)
+    assert (streamed.min(), streamed.max()) == (rebuilt.min(), rebuilt.max()) == (values[-7:].min(), values[-7:].max())
+
+
+IMPORT_BUDGET_S = 0.25
+
+IMPORT_PROBE = """
+import sys, time
+import numpy as np
+start = time.perf_counter()
+from rhythm_detector_v2 import RhythmConfig, RhythmDetector
+detector = RhythmDetector(RhythmConfig(window_seconds=120))
+detector.add_ticks(100 + np.sin(np.arange(150) / 5.0))
+detector.detect_wave_pattern()
+elapsed = time.perf_counter() - start
+heavy = sorted(name for name in sys.modules if name.split(".")[0] in ("scipy", "pandas"))
+print(elapsed, ",".join(heavy))
+"""
+
+
+def test_import_ingest_and_first_detection_stay_within_budget():
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE], capture_output=True, text=True, check=True
+    ).stdout.split()
+    assert len(output) == 1, f"heavy modules loaded eagerly: {output[1:]}"
+    assert float(output[0]) < IMPORT_BUDGET_S
+
+
+def test_ar_recursion_matches_direct_recursion():
+    from rhythm_detector_v2 import _ar_recursion
+
+    coeffs = np.array([0.5, -0.2, 0.1])
+    history = [0.3, -0.1, 0.4]
+    impulse = [0.0, 0.0, 1.0]
+    for _ in range(40):
+        history.append(sum(c * history[-1 - lag] for lag, c in enumerate(coeffs)))
+        impulse.append(sum(c * impulse[-1 - lag] for lag, c in enumerate(coeffs)))
+    path, psi = _ar_recursion(coeffs, np.array(history[:3]), 40)
+    assert np.allclose(path, history[3:], rtol=0, atol=1e-12)
+    assert np.allclose(psi, impulse[2:-1], rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("n", [120, 121])
+def test_spectrum_window_matches_time_domain_hann(n):
+    from rhythm_detector_v2 import _next_fast_len, _spectrum_rows
+
+    data = np.random.default_rng(31).normal(size=(2, n))
+    freqs, magnitudes, _ = _spectrum_rows(data, 1.0, PrecomputeCache())
+    nfft = 2 * _next_fast_len(n)
+    hann = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(n) / n)
+    centered = data - data.mean(axis=1, keepdims=True)
+    assert freqs.size == nfft // 2 + 1
+    assert np.allclose(magnitudes, np.abs(np.fft.rfft(centered * hann, n=nfft, axis=1)), atol=1e-10)
+
+
+def test_steady_state_detection_reuses_precomputed_setup():
+    detector = RhythmDetector(RhythmConfig(window_seconds=120))
+    t = np.arange(400)
+    detector.add_ticks(100 + np.sin(2 * np.pi * t[:200] / 30))
+    detector.detect_wave_pattern()
+    misses = detector._precomputed.misses
+    for tick in t[200:]:
+        detector.add_tick(100 + np.sin(2 * np.pi * tick / 30), timestamp=float(tick))
+        detector.detect_wave_pattern()
+    assert detector._precomputed.misses == misses
+    assert detector._precomputed.hits > 0
+
+
+def test_precompute_cache_evicts_least_recently_used():
+    cache = PrecomputeCache(maxsize=2)
+    cache.get("a", lambda: 1)
+    cache.get("b", lambda: 2)
+    cache.get("a", lambda: 0)
+    cache.get("c", lambda: 3)
+    assert cache.get("a", lambda: -1) == 1
+    assert cache.get("b", lambda: -2) == -2
+
+
+@pytest.mark.parametrize("band", [None, 4])
+def test_dtw_cutoff_abandons_only_losing_pairs(band):
+    rng = np.random.default_rng(37)
+    a = rng.normal(size=(40, 32))
+    b = rng.normal(size=(40, 32))
+    exact = dtw_distance(a, b, band=band)
+    cutoff = rng.uniform(0, 1.2, size=40) * exact.max()
+    pruned = dtw_distance(a, b, band=band, cutoff=cutoff)
+    assert np.all(np.where(np.isinf(pruned), exact > cutoff, pruned == exact))
+
+
+def test_template_pruning_matches_exhaustive_classification():
+    config = RhythmConfig(window_seconds=240)
+    rng = np.random.default_rng(41)
+    x = 2 * np.pi * np.arange(240) / rng.integers(15, 80, size=(60, 1))
+    shapes = np.stack((np.sin(x), np.sign(np.sin(x)), np.mod(x, 2 * np.pi) / np.pi - 1))
+    data = shapes[rng.integers(0, 3, size=60), np.arange(60)] + rng.normal(0, 0.3, (60, 240))
+    dominant = 1.0 / np.round(2 * np.pi / (x[:, 1] - x[:, 0]))
+
+    library = TemplateLibrary.extended()
+    pruned = library.classify(data, dominant, config)
+    exhaustive = TemplateLibrary.extended().classify(data, dominant, config, exhaustive=True)
+    assert pruned[0] == exhaustive[0]
+    assert np.array_equal(pruned[1], exhaustive[1])
+
+    stats = library.stats.as_dict()
+    assert stats["candidates"] == 60 * len(library.names)
+    assert stats["pruned"] + stats["abandoned"] + stats["full"] == stats["candidates"]
+    assert stats["rejection_rate"] > 0.5
+
+
+def test_state_round_trips_through_checkpoint(tmp_path):
+    config = RhythmConfig(window_seconds=120)
+    detector = RhythmDetector(config)
+    detector.add_ticks(100 + np.sin(2 * np.pi * np.arange(300) / 30))
+    state = detector.detect_wave_pattern()
+    path = tmp_path / "rhythm.state"
+    detector.save_state(path)
+
+    restored = RhythmDetector(config)
+    restored.load_state(path)
+    assert restored.version == detector.version
+    assert restored.detected_version == detector.detected_version
+    assert restored.detect_wave_pattern() == state
+    assert np.array_equal(restored._prices.view(), detector._prices.view())
+    assert restored.detect_wave_pattern(force=True) == detector.detect_wave_pattern(force=True)
+
+    with pytest.raises(ValueError):
+        RhythmDetector(RhythmConfig(window_seconds=60)).load_state(path)
+
+
+def test_checkpoint_resume_bridges_downtime(tmp_path):
+    config = RhythmConfig(window_seconds=120)
+    detector = RhythmDetector(config)
+    detector.add_ticks(100 + np.sin(2 * np.pi * np.arange(150) / 30))
+    path = tmp_path / "rhythm.state"
+    detector.save_state(path)
+
+    restored = RhythmDetector(config)
+    restored.load_state(path, resume_at=10_000.0)
+    restored.add_tick(100.0, timestamp=10_000.0)
+    assert len(restored._prices) == 120
+    assert restored._timestamps[-2] == 9_999.0
+
+
+@pytest.mark.parametrize("method", ["last", "mean", "vwap"])
+def test_decimator_matches_per_bucket_reference(method):
+    rng = np.random.default_rng(43)
+    timestamps = np.sort(rng.uniform(0, 200, size=6000))
+    prices = 100 + np.cumsum(rng.normal(scale=0.01, size=6000))
+    volumes = rng.integers(0, 5, size=6000).astype(float)
+
+    detector = RhythmDetector(RhythmConfig(window_seconds=300, fill_gaps=False))
+    decimator = TickDecimator(detector, method=method)
+    for chunk in np.array_split(np.arange(6000), 7):
+        decimator.add_ticks(prices[chunk], timestamps[chunk], volumes[chunk])
+    decimator.flush()
+
+    buckets = np.floor(timestamps).astype(int)
+    expected = []
+    for bucket in np.unique(buckets):
+        mask = buckets == bucket
+        if method == "last":
+            expected.append(prices[mask][-1])
+        elif method == "mean":
+            expected.append(prices[mask].mean())
+        elif volumes[mask].sum() > 0:
+            expected.append(np.sum(prices[mask] * volumes[mask]) / volumes[mask].sum())
+        else:
+            expected.append(prices[mask].mean())
+    assert np.allclose(detector._prices.view(), expected, rtol=0, atol=1e-9)
+    assert np.array_equal(detector._timestamps.view(), np.unique(buckets).astype(float))
+
+    scalar = RhythmDetector(RhythmConfig(window_seconds=300, fill_gaps=False))
+    scalar_decimator = TickDecimator(scalar, method=method)
+    for price, timestamp, volume in zip(prices, timestamps, volumes):
+        scalar_decimator.add_tick(price, timestamp, volume)
+    with pytest.raises(ValueError):
+        scalar_decimator.add_tick(100.0, timestamps[0], 1.0)
+    scalar_decimator.flush()
+    assert np.allclose(scalar._prices.view(), expected, rtol=0, atol=1e-9)
+    assert np.array_equal(scalar._timestamps.view(), detector._timestamps.view())
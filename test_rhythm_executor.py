@@ -0,0 +1,24 @@
+import numpy as np
+
+from rhythm_detector_v2 import RhythmBank, RhythmConfig
+from rhythm_executor import RhythmExecutor
+
+
+def test_executor_matches_bank_across_uneven_chunks():
+    config = RhythmConfig(window_seconds=120)
+    rng = np.random.default_rng(3)
+    periods = rng.integers(15, 60, size=(13, 1))
+    windows = 100 + np.sin(2 * np.pi * np.arange(120) / periods) + rng.normal(0, 0.2, (13, 120))
+
+    with RhythmExecutor(config, max_workers=3, min_rows_per_task=2) as executor:
+        states = executor.analyze(windows)
+        single = executor.submit(windows[4]).result()
+
+    expected = RhythmBank([], config).analyze(windows)
+    assert [state.as_dict() for state in states] == [state.as_dict() for state in expected]
+    assert single[0].as_dict() == expected[4].as_dict()
+
+
+def test_executor_handles_empty_batch():
+    with RhythmExecutor(RhythmConfig(window_seconds=120), max_workers=1) as executor:
+        assert executor.analyze(np.empty((0, 120))) == []
@@ -0,0 +1,32 @@
+import json
+
+import numpy as np
+
+from rhythm_sweep import grid, load_results, random_search, run_sweep, save_prices, trial_key
+
+
+def test_sweep_streams_results_and_resumes(tmp_path):
+    t = np.arange(1200)
+    prices = save_prices(tmp_path / "prices.npy", 100 + np.sin(2 * np.pi * t / 40))
+    results = tmp_path / "sweep.jsonl"
+    trials = grid(window_seconds=[240, 300], regularity_threshold=[0.0, 0.5])
+
+    first = run_sweep(prices, trials[:2], results, max_workers=2, horizon=20)
+    assert len(load_results(results)) == 2
+    with results.open("a") as out:
+        out.write('{"trial": "trunc')
+
+    ranked = run_sweep(prices, trials, results, max_workers=2, horizon=20)
+    records = load_results(results)
+    assert len(records) == 4
+    assert sorted(record["trial"] for record in records) == sorted(trial_key(params) for params in trials)
+    assert {record["trial"] for record in first} <= {record["trial"] for record in ranked}
+    sharpes = [record["sharpe"] for record in ranked]
+    assert sharpes == sorted(sharpes, reverse=True)
+
+
+def test_random_search_respects_space():
+    trials = random_search({"window_seconds": (200, 400), "dtw_downsample": [2, 4]}, trials=20, seed=1)
+    assert all(200 <= params["window_seconds"] <= 400 for params in trials)
+    assert all(isinstance(params["window_seconds"], int) for params in trials)
+    assert len({json.dumps(params, sort_keys=True) for params in trials}) == len(trials)
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from ring_buffer import RingBuffer
+
+
+def test_append_wraps_in_insertion_order():
+    buffer = RingBuffer(4)
+    for value in range(6):
+        buffer.append(float(value))
+    assert len(buffer) == 4
+    np.testing.assert_array_equal(buffer.view(), [2.0, 3.0, 4.0, 5.0])
+    assert buffer[0] == 2.0
+    assert buffer[-1] == 5.0
+    with pytest.raises(IndexError):
+        buffer[4]
+
+
+def test_extend_matches_repeated_append():
+    expected = RingBuffer(5)
+    buffer = RingBuffer(5)
+    for chunk in (np.arange(3.0), np.arange(3.0, 7.0), np.arange(7.0, 8.0), np.arange(8.0, 20.0)):
+        buffer.extend(chunk)
+        for value in chunk:
+            expected.append(value)
+        np.testing.assert_array_equal(buffer.view(), expected.view())
+
+
+def test_view_is_read_only_and_copy_is_owned():
+    buffer = RingBuffer(3)
+    buffer.extend([1.0, 2.0])
+    view = buffer.view()
+    assert not view.flags.writeable
+    copied = buffer.copy()
+    copied[0] = 99.0
+    assert buffer[0] == 1.0
+    buffer.clear()
+    assert len(buffer) == 0
+
+
+def test_rows_keep_their_shape():
+    buffer = RingBuffer(3, width=2)
+    buffer.extend(np.arange(8.0).reshape(4, 2))
+    buffer.append([8.0, 9.0])
+    np.testing.assert_array_equal(buffer.view(), [[4.0, 5.0], [6.0, 7.0], [8.0, 9.0]])
+    np.testing.assert_array_equal(buffer[-1], [8.0, 9.0])
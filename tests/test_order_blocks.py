@@ -1,6 +1,17 @@
+import numpy as np
+import pytest
 from fastapi.testclient import TestClient
 
+from backend import order_block_detector
 from backend.main import app
+from backend.order_block_detector import (
+    Candle,
+    CandleFrame,
+    OrderBlockConfig,
+    OrderBlockDetector,
+    StreamingOrderBlockDetector,
+)
+from backend.services.chart_data_service import candle_frame_from_payload
 
 client = TestClient(app)
 
@@ -50,3 +61,154 @@ def test_backtest_response():
     assert response.status_code == 200
     payload = response.json()
     assert payload["total_trades"] >= 0
+
+
+def _random_candles(n, seed=0):
+    rng = np.random.default_rng(seed)
+    prices = np.cumsum(rng.normal(size=n)) + 100
+    return [
+        Candle(
+            timestamp=float(i),
+            open=float(prices[i]),
+            high=float(prices[i] + abs(rng.normal())),
+            low=float(prices[i] - abs(rng.normal())),
+            close=float(prices[i] + rng.normal(scale=0.3)),
+            volume=float(rng.integers(50, 150)),
+        )
+        for i in range(n)
+    ]
+
+
+def test_candle_frame_matches_candle_list():
+    candles = _random_candles(300)
+    frame = CandleFrame.from_candles(candles)
+    assert len(frame) == 300 and frame[7] == candles[7]
+    assert frame.to_candles() == candles
+
+    for zone_type in ("wick", "body"):
+        detector = OrderBlockDetector(OrderBlockConfig(zone_type=zone_type))
+        from_list = detector.detect(candles)
+        assert from_list and detector.detect(frame) == from_list
+        assert detector.detect_entry(frame, from_list[-1]) == detector.detect_entry(candles, from_list[-1])
+
+
+def test_candle_frame_from_upstream_json():
+    frame = candle_frame_from_payload(
+        [
+            {"datetime": "2025-01-02 14:30:00", "open": 1, "high": 3, "low": 0.5, "close": 2, "volume": 10},
+            {"datetime": "2025-01-02 14:35:00", "open": 2, "high": 4, "low": 1.5, "close": 3, "volume": None},
+        ]
+    )
+    assert frame.close.tolist() == [2.0, 3.0]
+    assert frame.volume.tolist() == [10.0, 0.0]
+    assert frame.timestamp[1] - frame.timestamp[0] == 300_000
+    assert frame.high.flags.c_contiguous and frame.high.dtype.name == "float64"
+
+    with pytest.raises(ValueError):
+        CandleFrame(timestamp=[0, 1], open=[1, 2], high=[1, 2], low=[1, 2], close=[1, 2], volume=[1])
+
+
+def test_swing_masks_match_fractal_definition():
+    frame = CandleFrame.from_candles(_random_candles(400, seed=3))
+    frame.high[100:110] = frame.high[100]  # plateau: every candle ties the window extreme
+    for period in (1, 2, 4):
+        detector = OrderBlockDetector(OrderBlockConfig(fractal_period=period))
+        highs, lows = detector._swings(frame)
+        expected_high = np.zeros(len(frame), dtype=bool)
+        expected_low = np.zeros(len(frame), dtype=bool)
+        for i in range(period, len(frame) - period):
+            expected_high[i] = frame.high[i] == frame.high[i - period : i + period + 1].max()
+            expected_low[i] = frame.low[i] == frame.low[i - period : i + period + 1].min()
+        assert np.array_equal(highs, expected_high)
+        assert np.array_equal(lows, expected_low)
+
+    flat = CandleFrame.from_records([{"open": 1, "high": 1, "low": 1, "close": 1, "volume": 1}] * 60)
+    blocks = OrderBlockDetector().detect(flat)
+    assert [block.index for block in blocks[:4]] == [2, 2, 3, 3]
+    assert {block.type for block in blocks} == {"bullish"}
+
+
+@pytest.mark.parametrize("dense_cells", [0, 1 << 18])
+def test_batched_test_counts_match_per_zone_scan(monkeypatch, dense_cells):
+    monkeypatch.setattr(order_block_detector, "_DENSE_TEST_CELLS", dense_cells)
+
+    rng = np.random.default_rng(7)
+    for size in (1, 2, 37, 256, 300):
+        low = np.round(rng.normal(size=size), 1)
+        high = np.round(low + np.abs(rng.normal(size=size)), 1)
+        high[::11] = low[::11] - 0.5  # malformed candles are counted the same way
+        low[size // 2] = np.nan
+        frame = CandleFrame(timestamp=np.arange(size), open=low, high=high, low=low, close=high, volume=np.ones(size))
+        index = rng.integers(0, size, size=40)
+        zone_low = np.round(rng.normal(size=40), 1)
+        zone_high = zone_low + np.round(rng.normal(size=40), 1)
+        zone_low[0] = np.nan
+
+        expected = []
+        for a, b, i in zip(zone_low, zone_high, index):
+            later_low, later_high = frame.low[i + 1 :], frame.high[i + 1 :]
+            touched = ((a <= later_low) & (later_low <= b)) | ((a <= later_high) & (later_high <= b))
+            expected.append(int(np.count_nonzero(touched)))
+
+        counts = OrderBlockDetector()._test_counts(frame, zone_low, zone_high, index)
+        assert counts.tolist() == expected
+
+
+def test_wilder_atr_features():
+    frame = CandleFrame.from_candles(_random_candles(300, seed=5))
+    detector = OrderBlockDetector(OrderBlockConfig(atr_mode="wilder", atr_period=14))
+    atr = detector._wilder_atr(frame, 14)
+    assert np.isnan(atr[:14]).all()
+
+    true_range = np.maximum(
+        frame.high[1:] - frame.low[1:],
+        np.maximum(np.abs(frame.high[1:] - frame.close[:-1]), np.abs(frame.low[1:] - frame.close[:-1])),
+    )
+    expected = [np.mean(true_range[:14])]
+    for value in true_range[14:]:
+        expected.append((expected[-1] * 13 + value) / 14)
+    assert np.allclose(atr[14:], expected)
+
+    blocks = detector.detect(frame)
+    assert blocks
+    for block in blocks:
+        start, end = max(0, block.index - 3), block.index + 4
+        move = frame.high[start:end].max() - frame.low[start:end].min()
+        bar_atr = atr[block.index]
+        assert block.displacement == (move / bar_atr if bar_atr > 0 else 0.0)
+        assert 0.0 <= block.score <= 100.0
+
+
+@pytest.mark.parametrize("fractal_period", [1, 2, 4])
+def test_streaming_detector_matches_batch_detection(fractal_period):
+    candles = _random_candles(300, seed=fractal_period)
+    config = OrderBlockConfig(fractal_period=fractal_period, atr_mode="wilder", min_score=60.0)
+    streaming = StreamingOrderBlockDetector(config)
+    events = [event for candle in candles for event in streaming.append_candle(candle)]
+
+    settled = len(candles) - 1 - max(fractal_period, 3)
+    batch = OrderBlockDetector(config).detect(CandleFrame.from_candles(candles))
+    batch = [block for block in batch if block.index <= settled]
+    assert len(streaming.order_blocks) == len(batch)
+    for streamed, expected in zip(streaming.order_blocks, batch):
+        if expected.is_valid:
+            assert streamed == expected
+        else:
+            assert not streamed.is_valid and streamed.index == expected.index and streamed.score == expected.score
+    assert streaming.active == [block for block in batch if block.is_valid]
+
+    kinds = {event.kind for event in events}
+    assert kinds <= {"created", "changed", "invalidated"} and "created" in kinds
+    for event in events:
+        if event.kind == "invalidated":
+            assert event.order_block.test_count == config.max_tests + 1
+
+
+def test_streaming_detector_scores_blocks_as_of_confirmation():
+    candles = _random_candles(200, seed=11)
+    streaming = StreamingOrderBlockDetector()
+    for bar, candle in enumerate(candles):
+        for event in streaming.append_candle(candle):
+            if event.kind == "created" and bar >= 60:
+                history = OrderBlockDetector().detect(candles[: bar + 1])
+                assert event.order_block in [block for block in history if block.index == event.order_block.index]
@@ -0,0 +1,183 @@
+import asyncio
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.config import settings
+from backend.main import app
+from backend.services import rtyhiim_service
+from backend.services.rtyhiim_service import (
+    DetectorRegistry,
+    RhythmCheckpointer,
+    _build_detector,
+    _generate_prices,
+    checkpoint_path,
+    restore_detector,
+    run_ingestion,
+    shutdown_executor,
+)
+
+
+def test_detect_rtyhiim_runs_on_worker_pool():
+    with TestClient(app) as client:
+        response = client.post("/api/rtyhiim/detect")
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["symbol"] == "NDX.INDX"
+    assert payload["state"]["direction"] in {"BUY", "SELL", "HOLD"}
+    assert payload["age_s"] >= 0.0
+
+
+def test_registry_serves_cached_state_until_new_ticks_arrive():
+    registry = DetectorRegistry()
+    try:
+        entry = registry.get_or_create("NDX.INDX", "1m")
+        assert registry.latest("NDX.INDX", "1m") == (None, None)
+        assert asyncio.run(registry.refresh()) == 1
+        state, age_s = registry.latest("NDX.INDX", "1m")
+        assert state["pattern_type"] and age_s >= 0.0
+        assert asyncio.run(registry.refresh()) == 0
+
+        prices, timestamps = _generate_prices(end=entry.last_timestamp + 5, start=entry.last_timestamp)
+        registry.ingest("NDX.INDX", "1m", prices, timestamps)
+        assert len(prices) == 5
+        assert asyncio.run(registry.refresh()) == 1
+        assert entry.state_version == entry.detector.version
+        assert registry.get_or_create("NDX.INDX", "1m") is entry
+    finally:
+        registry.close()
+        shutdown_executor()
+
+
+def test_checkpointer_warm_starts_a_new_detector(tmp_path):
+    detector = _build_detector()
+    detector.add_ticks(100 + np.sin(2 * np.pi * np.arange(700) / 60))
+    state = detector.detect_wave_pattern()
+    path = tmp_path / "NDX.rhythm"
+
+    checkpointer = RhythmCheckpointer(detector, path, interval_s=3600).start()
+    checkpointer.stop()
+    assert path.exists()
+    assert not checkpointer.checkpoint()
+
+    restored = restore_detector(path)
+    assert restored.version == detector.version
+    assert restored.detect_wave_pattern() == state
+
+
+def test_registry_validates_keys_and_evicts_least_recent(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "rtyhiim_checkpoint_dir", str(tmp_path))
+    assert checkpoint_path("NDX.INDX", "1m") == tmp_path / "NDX.INDX_1m.rhythm"
+    assert checkpoint_path("NDX.INDX", "5m") != checkpoint_path("NDX.INDX", "1m")
+    for symbol in ("../../tmp/escaped", "a/b", ".hidden", "", "x" * 40):
+        with pytest.raises(ValueError):
+            checkpoint_path(symbol, "1m")
+
+    registry = DetectorRegistry(max_entries=2)
+    try:
+        with pytest.raises(ValueError):
+            registry.get_or_create("../escaped", "1m")
+        registry.get_or_create("AAA", "1m")
+        registry.get_or_create("BBB", "1m")
+        registry.get_or_create("AAA", "1m")
+        registry.get_or_create("CCC", "1m")
+        assert registry.keys() == [("AAA", "1m"), ("CCC", "1m")]
+    finally:
+        registry.close()
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["AAA_1m.rhythm", "BBB_1m.rhythm", "CCC_1m.rhythm"]
+
+
+def test_truncated_checkpoint_is_ignored(tmp_path):
+    detector = _build_detector()
+    detector.add_ticks(100 + np.sin(2 * np.pi * np.arange(700) / 60))
+    path = tmp_path / "NDX.INDX_1m.rhythm"
+    detector.save_state(path)
+    data = path.read_bytes()
+
+    for size in (9, 12, 40, len(data) - 8):
+        path.write_bytes(data[:size])
+        with pytest.raises(ValueError):
+            _build_detector().load_state(path)
+        restored = restore_detector(path)
+        assert restored.version == 0
+
+
+def test_checkpoint_with_malformed_header_is_ignored(tmp_path):
+    detector = _build_detector()
+    detector.add_ticks(100 + np.sin(2 * np.pi * np.arange(700) / 60))
+    detector.detect_wave_pattern()
+    path = tmp_path / "NDX.INDX_1m.rhythm"
+    detector.save_state(path)
+    data = path.read_bytes()
+    length = int.from_bytes(data[8:16], "little")
+    header = data[16 : 16 + length]
+
+    # Same-length headers keep the data block where the reader expects it.
+    renames = ((b'"version"', b'"versioN"'), (b'"config_hash"', b'"config_hasH"'), (b'"phase"', b'"phasE"'))
+    for old, new in renames:
+        assert len(old) == len(new) and old in header
+        path.write_bytes(data[:16] + header.replace(old, new, 1) + data[16 + length :])
+        with pytest.raises(ValueError):
+            _build_detector().load_state(path)
+        assert restore_detector(path).version == 0
+
+
+def test_repeat_requests_survive_a_lifespan_restart():
+    for _ in range(2):
+        with TestClient(app) as client:
+            for _ in range(2):
+                assert client.post("/api/rtyhiim/detect").status_code == 200
+
+
+def test_failed_final_checkpoint_does_not_escape_eviction_or_close(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "rtyhiim_checkpoint_dir", str(tmp_path))
+    registry = DetectorRegistry(max_entries=1)
+    aaa = registry.get_or_create("AAA", "1m")
+
+    def disk_full(path):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(aaa.detector, "save_state", disk_full)
+    aaa.detector.add_ticks([101.0])
+    bbb = registry.get_or_create("BBB", "1m")
+    assert registry.keys() == [("BBB", "1m")]
+
+    monkeypatch.setattr(bbb.detector, "save_state", disk_full)
+    bbb.detector.add_ticks([101.0])
+    registry.close()
+    assert registry.keys() == []
+    assert aaa.checkpointer._thread is None and bbb.checkpointer._thread is None
+
+
+def test_ingestion_loop_survives_a_failing_detector(monkeypatch):
+    registry = DetectorRegistry()
+    aaa = registry.get_or_create("AAA", "1m")
+    bbb = registry.get_or_create("BBB", "1m")
+    aaa.last_timestamp -= 5
+    bbb.last_timestamp -= 5
+    cycles = []
+
+    def broken(prices, timestamps):
+        raise RuntimeError("bad feed")
+
+    async def refresh():
+        cycles.append(bbb.detector.version)
+        return 0
+
+    monkeypatch.setattr(aaa.detector, "add_ticks", broken)
+    monkeypatch.setattr(registry, "refresh", refresh)
+    monkeypatch.setattr(rtyhiim_service, "registry", registry)
+
+    async def run_cycles():
+        task = asyncio.create_task(run_ingestion(interval_s=0.0))
+        for _ in range(1000):
+            if len(cycles) >= 3 or task.done():
+                break
+            await asyncio.sleep(0)
+        assert not task.done()
+        task.cancel()
+
+    asyncio.run(run_cycles())
+    assert cycles[0] > 0
+    registry.close()